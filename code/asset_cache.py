@@ -0,0 +1,88 @@
+import pygame
+
+from settings import *
+from collections import OrderedDict
+from threading import RLock
+
+
+def get_asset_size(asset):
+    # bytes of pixel data owned by the asset, views into other surfaces or into the asset pack are free
+    if isinstance(asset, pygame.Surface):
+        if asset.get_parent() is not None or asset.get_flags() & pygame.PREALLOC:
+            return 0
+        return asset.get_width() * asset.get_height() * asset.get_bytesize()
+    if isinstance(asset, dict):
+        return sum(get_asset_size(item) for item in asset.values())
+    if isinstance(asset, (list, tuple)):
+        return sum(get_asset_size(item) for item in asset)
+    return 0
+
+
+class AssetCache:
+    # assets that can be created again, the least recently used ones are dropped once the budget is exceeded
+    # a dropped asset stays in memory until the last sprite using it is gone
+    def __init__(self, budget=ASSET_CACHE_BUDGET):
+        self.budget = budget
+        self.entries = OrderedDict()  # key -> (asset, size), least recently used first
+        self.size = 0
+        self.lock = RLock()  # maps are prefetched on a worker thread
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def add(self, key, asset):
+        size = get_asset_size(asset)
+        with self.lock:
+            self.discard(key)
+            self.entries[key] = (asset, size)
+            self.size += size
+            self.evict()
+        return asset
+
+    def discard(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def evict(self):
+        # the newest asset is kept even when it is larger than the whole budget
+        with self.lock:
+            while self.size > self.budget and len(self.entries) > 1:
+                _, (_, size) = self.entries.popitem(last=False)
+                self.size -= size
+                self.evictions += 1
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.evict()
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'size': self.size,
+            'budget': self.budget
+        }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+asset_cache = AssetCache()
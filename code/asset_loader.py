@@ -0,0 +1,200 @@
+import time
+
+from settings import *
+from support import convert_image, slice_coastline, slice_character, slice_monster, slice_attack
+from tile_map import load_tmx_map, deserialize_map
+from sound_effects import load_sound
+from os.path import join, isfile, basename
+from os import walk
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# the slow decodes (sound effects, tmx parsing) come first so they don't finish last on a single worker
+ASSET_SOURCES = {
+    'audio': ('..', 'audio'),
+    'maps': ('..', 'data', 'maps'),
+    'water': ('..', 'graphics', 'tilesets', 'water'),
+    'coast': ('..', 'graphics', 'tilesets', 'coast.png'),
+    'characters': ('..', 'graphics', 'characters'),
+    'icons': ('..', 'graphics', 'icons'),
+    'monsters': ('..', 'graphics', 'monsters'),
+    'attacks': ('..', 'graphics', 'attacks'),
+    'ui': ('..', 'graphics', 'ui'),
+    'backgrounds': ('..', 'graphics', 'backgrounds'),
+    'stars': ('..', 'graphics', 'other', 'star animation')
+}
+SHEET_SLICERS = {
+    'coast': slice_coastline,
+    'characters': slice_character,
+    'monsters': slice_monster,
+    'attacks': slice_attack
+}
+
+
+def keep(asset):
+    return asset
+
+
+class LazyAssets(Mapping):
+    # an asset category that is decoded the first time an asset is looked up
+    # prewarm starts decoding on a worker thread, the main thread only finishes it on the first lookup
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prewarm')
+
+    def __init__(self):
+        self.jobs = {}
+        self.assets = {}
+        self.pending = {}
+
+        # stats
+        self.load_time = 0
+
+    def add(self, name, decode, args, finish):
+        self.jobs[name] = (decode, args, finish)
+
+    def prewarm(self, name):
+        if name in self.jobs and name not in self.assets and name not in self.pending:
+            decode, args, _ = self.jobs[name]
+            self.pending[name] = self.executor.submit(decode, *args)
+
+    def __getitem__(self, name):
+        if name not in self.assets:
+            decode, args, finish = self.jobs[name]
+            start = time.perf_counter()
+            future = self.pending.pop(name, None)
+            self.assets[name] = finish(future.result() if future else decode(*args))
+            self.load_time += time.perf_counter() - start
+        return self.assets[name]
+
+    def __contains__(self, name):
+        return name in self.jobs
+
+    def __iter__(self):
+        return iter(self.jobs)
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def get_stats(self):
+        return {'loaded': len(self.assets), 'pending': len(self.pending), 'total': len(self.jobs),
+                'time': self.load_time}
+
+
+def prewarm(assets, names):
+    if isinstance(assets, LazyAssets):
+        for name in names:
+            assets.prewarm(name)
+
+
+class AssetLoader:
+    def __init__(self, workers=ASSET_LOADER_WORKERS, lazy=()):
+        self.workers = workers
+        self.lazy = lazy
+        self.jobs = []
+        self.assets = {}
+
+        # stats
+        self.timings = {}
+        self.decode_timings = {}
+
+    def add(self, category, name, decode, *args, finish=keep):
+        # decode runs on a worker thread, finish runs on the main thread (convert, convert_alpha, slicing)
+        if category in self.lazy:
+            self.assets.setdefault(category, LazyAssets()).add(name, decode, args, finish)
+        else:
+            self.jobs.append((category, name, decode, args, finish))
+
+    def add_folder(self, category, decode, *path, finish=keep):
+        for folder_path, _, file_names in walk(join(*path)):
+            for file_name in file_names:
+                self.add(category, file_name.split('.')[0], decode, join(folder_path, file_name), finish=finish)
+
+    @staticmethod
+    def decode(decode, args):
+        start = time.perf_counter()
+        return decode(*args), time.perf_counter() - start
+
+    def run(self, progress=None):
+        start = time.perf_counter()
+        remaining = {}
+        for category, *_ in self.jobs:
+            self.assets.setdefault(category, {})
+            remaining[category] = remaining.get(category, 0) + 1
+            self.decode_timings.setdefault(category, 0)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.decode, decode, args): (category, name, finish)
+                       for category, name, decode, args, finish in self.jobs}
+            for done, future in enumerate(as_completed(futures), 1):
+                category, name, finish = futures[future]
+                decoded, decode_time = future.result()
+                self.assets[category][name] = finish(decoded)
+                self.decode_timings[category] += decode_time
+
+                # a category is done once its last asset is handed over
+                remaining[category] -= 1
+                if not remaining[category]:
+                    self.timings[category] = time.perf_counter() - start
+                if progress:
+                    progress(done / len(futures))
+
+        self.timings['total'] = time.perf_counter() - start
+        self.jobs.clear()
+        return self.assets
+
+    def get_stats(self):
+        stats = {category: {'wall': self.timings[category], 'decode': self.decode_timings.get(category, 0)}
+                 for category in self.timings}
+        stats.update({category: assets.get_stats() for category, assets in self.assets.items()
+                      if isinstance(assets, LazyAssets)})
+        return stats
+
+
+def convert_sheet(category):
+    slicer = SHEET_SLICERS.get(category)
+    return lambda surf: slicer(convert_image(surf)) if slicer else convert_image(surf)
+
+
+def get_asset_files(category, sources=ASSET_SOURCES):
+    path = join(*sources[category])
+    if isfile(path):
+        return [(basename(path).split('.')[0], path)]
+    return [(file_name.split('.')[0], join(folder_path, file_name))
+            for folder_path, _, file_names in walk(path) for file_name in file_names]
+
+
+def read_baked_map(pack, name):
+    return deserialize_map(pack.read('maps', name)[1], name)
+
+
+def get_baked(pack, category, loader):
+    # lazy assets also get their pages read ahead, so prewarming them is not just creating the surface
+    return pack.prefetch_surface if category in loader.lazy else pack.get_surface
+
+
+def queue_game_assets(loader, pack=None):
+    # everything Game.import_assets needs, grouped into the categories that get timed
+    # baked entries are used when the pack is up to date with the source file
+    for category in ASSET_SOURCES:
+        for name, path in get_asset_files(category):
+            baked = pack and pack.is_fresh(category, name)
+            if category == 'audio':
+                # songs are streamed by the music player, only the short sound effects are decoded
+                if name.split('_')[0] != 'music':
+                    loader.add(category, name, load_sound, path)
+            elif category == 'maps':
+                # tiles are cut from the tileset images when a map is set up
+                if baked:
+                    loader.add(category, name, read_baked_map, pack, name)
+                else:
+                    loader.add(category, name, load_tmx_map, path)
+            elif baked:
+                loader.add(category, name, get_baked(pack, category, loader), category, name,
+                           finish=convert_sheet(category))
+            else:
+                loader.add(category, name, pygame.image.load, path, finish=convert_sheet(category))
+
+            # monster frames flipped to face right, only available from the pack
+            if category == 'monsters' and pack and pack.is_fresh('flipped', name):
+                loader.add('flipped', name, get_baked(pack, 'flipped', loader), 'flipped', name,
+                           finish=convert_sheet(category))
+    return loader
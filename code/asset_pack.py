@@ -0,0 +1,100 @@
+import json
+import mmap
+import numpy
+import pygame
+import struct
+
+from settings import *
+from os import stat
+from os.path import exists, normpath
+from debug import record_error
+
+PACK_MAGIC = b'RPGPACK2'
+PACK_HEADER = struct.Struct('<8sQQ')  # magic, index offset, index length
+PIXEL_FORMAT = 'BGRA'  # byte order of convert_alpha() surfaces, so baked pixels need no swizzling
+
+
+class AssetPack:
+    # pre-decoded assets written by bake.py, every entry remembers the source file it was built from
+    # the file is mapped, not read: surfaces point into the mapping and pages load the first time they are drawn
+    def __init__(self, path=ASSET_PACK_PATH):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mmap)
+        magic, index_offset, index_length = PACK_HEADER.unpack_from(self.view)
+        if magic != PACK_MAGIC:
+            self.close()
+            raise ValueError('not an asset pack')
+        self.entries = json.loads(self.view[index_offset:index_offset + index_length].tobytes())
+
+        # plain images can also be found by the file they were baked from
+        self.sources = {normpath(entry['source']): key.split('/') for key, entry in self.entries.items()
+                        if entry['kind'] == 'image'}
+
+    @staticmethod
+    def open(path=ASSET_PACK_PATH):
+        if not exists(path):
+            return None
+        try:
+            return AssetPack(path)
+        except (OSError, ValueError, struct.error) as e:
+            record_error(f"Could not open asset pack {path}: {e}")
+            return None
+
+    def close(self):
+        # only possible once no surface or array points into the mapping anymore
+        self.view.release()
+        self.mmap.close()
+
+    @staticmethod
+    def get_key(category, name):
+        return f'{category}/{name}'
+
+    def is_fresh(self, category, name):
+        # a cheap stat instead of hashing, bake.py does the hashing when it rebuilds
+        # maps also check the tilesets and images they depend on, packs baked before those were recorded are stale
+        entry = self.entries.get(self.get_key(category, name))
+        if entry is None or (entry['kind'] == 'map' and 'dependencies' not in entry):
+            return False
+        files = [(entry['source'], entry['file_size'], entry['mtime']), *entry.get('dependencies', ())]
+        try:
+            return all(self.is_unchanged(path, size, mtime) for path, size, mtime in files)
+        except OSError:
+            return False
+
+    @staticmethod
+    def is_unchanged(path, size, mtime):
+        source = stat(path)
+        return source.st_size == size and source.st_mtime_ns == mtime
+
+    def read(self, category, name):
+        entry = self.entries[self.get_key(category, name)]
+        return entry, self.view[entry['offset']:entry['offset'] + entry['length']]
+
+    # decoders, they return the same thing as decoding the source file would
+    def get_surface(self, category, name):
+        entry, data = self.read(category, name)
+        return pygame.image.frombuffer(data, entry['size'], PIXEL_FORMAT)
+
+    def prefetch_surface(self, category, name):
+        # ask the os to read the pages in the background before the surface is first drawn
+        entry, data = self.read(category, name)
+        if hasattr(self.mmap, 'madvise'):
+            start = entry['offset'] - entry['offset'] % mmap.PAGESIZE
+            self.mmap.madvise(mmap.MADV_WILLNEED, start, entry['offset'] + entry['length'] - start)
+        return pygame.image.frombuffer(data, entry['size'], PIXEL_FORMAT)
+
+    def get_image(self, path):
+        key = self.sources.get(normpath(path))
+        return self.get_surface(*key) if key and self.is_fresh(*key) else None
+
+    def get_outlines(self, category, name, width):
+        entry, data = self.read(category, name)
+        if entry['width'] != width:
+            return None
+        alphas = numpy.frombuffer(data, numpy.uint8).reshape(entry['shape'])
+        return dict(zip(entry['states'], alphas))
+
+
+asset_pack = AssetPack.open()
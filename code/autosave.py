@@ -0,0 +1,180 @@
+import os
+import zlib
+import struct
+from settings import *
+from save_format import SaveWriter, SaveReader, get_save_state, encode_save, decode_save
+from save_manager import SaveManager, write_file, DECODE_ERRORS
+from debug import debug
+
+# journal records, each one is framed by its length and crc32 so a record cut off by a crash is skipped
+RECORD_DEFEATED = 0  # trainer id
+RECORD_MONSTER = 1  # party index, name, level, health, energy, exp (a caught, levelled or evolved monster)
+RECORD_WORLD = 2  # map name, player position
+RECORD_CLOSED = 3  # the game was closed normally, there is nothing to recover
+
+AUTOSAVE_SLOT = 'autosave'  # what the main menu's load entry for recovering the last session passes as save data
+
+
+def encode_record(kind, play_time, *values):
+    writer = SaveWriter()
+    writer.pack('<Bd', kind, play_time)
+    if kind == RECORD_DEFEATED:
+        writer.string(values[0])
+    elif kind == RECORD_MONSTER:
+        index, name, level, health, energy, exp = values
+        writer.pack('<H', index)
+        writer.string(name)
+        writer.pack('<Hddd', level, health, energy, exp)
+    elif kind == RECORD_WORLD:
+        name, (x, y) = values
+        writer.string(name)
+        writer.pack('<dd', x, y)
+    body = bytes(writer.body)
+    return struct.pack('<HI', len(body), zlib.crc32(body)) + body
+
+
+def read_records(data):
+    offset = 0
+    while offset + 6 <= len(data):
+        length, crc = struct.unpack_from('<HI', data, offset)
+        body = data[offset + 6:offset + 6 + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            break
+        offset += 6 + length
+        yield body
+
+
+def apply_record(state, body):
+    # every record sets a value instead of changing it, so replaying one twice does no harm
+    reader = SaveReader(body)
+    kind, state['play_time'] = reader.unpack('<Bd')
+    if kind == RECORD_DEFEATED:
+        name = reader.string()
+        if name not in state['defeated']:
+            state['defeated'].append(name)
+    elif kind == RECORD_MONSTER:
+        index, = reader.unpack('<H')
+        name = reader.string()
+        level, health, energy, exp = reader.unpack('<Hddd')
+        monster = {'name': name, 'level': level, 'health': health, 'energy': energy, 'exp': exp}
+        if index < len(state['player_monsters']):
+            state['player_monsters'][index] = monster
+        else:
+            state['player_monsters'].append(monster)
+    elif kind == RECORD_WORLD:
+        state['current_world'] = reader.string()
+        state['player']['pos'] = reader.unpack('<dd')
+        # the characters of the new map start from the map
+        state['characters'] = []
+    return kind
+
+
+def get_party_values(monster):
+    # what a RECORD_MONSTER keeps of a party monster
+    return monster.name, monster.level, monster.health, monster.energy, monster.exp
+
+
+class Autosave:
+    # a snapshot of the game plus a journal of what changed since, written by the save thread
+    # a change costs a record of a few bytes instead of a whole save, the journal is folded into a new snapshot
+    # once it gets long
+    def __init__(self, filepath='../save_data/saves/', name='autosave'):
+        self.snapshot_path = os.path.join(filepath, name + '.snapshot')
+        self.journal_path = os.path.join(filepath, name + '.journal')
+        self.records = []  # encoded records that were not handed to the save thread yet
+        self.journal_records = 0  # records written since the last snapshot
+        self.party = {}  # party index -> what was last recorded of the monster
+        self.error = None  # debug draws on the screen, so errors of the save thread are reported on the main thread
+
+        # stats
+        self.bytes_written = 0
+        self.snapshots = 0
+
+    def record(self, kind, play_time, *values):
+        self.records.append(encode_record(kind, play_time, *values))
+
+    def record_party(self, monsters, play_time):
+        # only the monsters that were caught or changed since they were last recorded
+        for index, monster in monsters.items():
+            values = get_party_values(monster)
+            if self.party.get(index) != values:
+                self.party[index] = values
+                self.record(RECORD_MONSTER, play_time, index, *values)
+
+    def flush(self, get_save_data=None):
+        # get_save_data returns the full save dict of the game, it is only called once the journal should be folded
+        # into a snapshot
+        self.report_error()
+        if self.records:
+            data = b''.join(self.records)
+            self.journal_records += len(self.records)
+            self.records.clear()
+            SaveManager.executor.submit(self.append, data)
+        if get_save_data and self.journal_records >= JOURNAL_COMPACT_RECORDS:
+            self.compact(get_save_data())
+
+    def start(self, save_data, monsters):
+        # a new base for the journal, after a new game was started or a save was loaded
+        self.records.clear()
+        self.party = {index: get_party_values(monster) for index, monster in monsters.items()}
+        self.compact(save_data)
+
+    def compact(self, save_data):
+        # the snapshot is written before the journal is emptied, a crash in between replays records it already has
+        self.journal_records = 0
+        SaveManager.executor.submit(self.write_snapshot, get_save_state(save_data))
+
+    def close(self, play_time):
+        self.record(RECORD_CLOSED, play_time)
+        self.flush()
+
+    # save thread
+    def append(self, data):
+        try:
+            with open(self.journal_path, 'ab') as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            self.bytes_written += len(data)
+        except OSError as e:
+            self.error = f"Could not write the autosave journal {self.journal_path}: {e}"
+
+    def write_snapshot(self, state):
+        try:
+            data = encode_save(state)
+            write_file(self.snapshot_path, data)
+            with open(self.journal_path, 'wb'):
+                pass
+            self.bytes_written += len(data)
+            self.snapshots += 1
+        except OSError as e:
+            self.error = f"Could not write the autosave {self.snapshot_path}: {e}"
+
+    def report_error(self):
+        if self.error:
+            debug(self.error)
+            self.error = None
+
+    # start-up
+    def recover(self):
+        # the state the last session ended in if it was not closed normally, None otherwise
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'rb') as file:
+                state = decode_save(file.read())
+            journal = b''
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'rb') as file:
+                    journal = file.read()
+            kind = None
+            for body in read_records(journal):
+                kind = apply_record(state, body)
+        except (OSError, *DECODE_ERRORS) as e:
+            debug(f"Could not recover the autosave: {e}")
+            return None
+        return state if kind != RECORD_CLOSED else None
+
+    def get_stats(self):
+        return {'bytes written': self.bytes_written, 'snapshots': self.snapshots,
+                'journal records': self.journal_records}
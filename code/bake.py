@@ -0,0 +1,134 @@
+import os
+import json
+import numpy
+import pygame
+
+from time import perf_counter
+from settings import *
+from support import hash_file, create_outline_alpha, slice_tilemap, slice_monster
+from tile_map import parse_tmx_map, serialize_map, hash_map_file, get_map_dependencies
+from asset_loader import ASSET_SOURCES, get_asset_files
+from os.path import normpath
+from asset_pack import AssetPack, PACK_MAGIC, PACK_HEADER, PIXEL_FORMAT
+
+PACK_ALIGNMENT = 16
+
+# images the maps cut their tiles from, baked so map tiles are views into the pack as well
+TILE_SOURCES = {
+    'tilesets': ('..', 'graphics', 'tilesets'),
+    'objects': ('..', 'graphics', 'objects')
+}
+BAKE_VERSION = 5  # bump when a builder changes so old entries are not reused
+
+
+# builders, each returns the entry metadata and its bytes
+def bake_image(path):
+    surf = pygame.image.load(path).convert_alpha()
+    return {'kind': 'image', 'size': surf.get_size()}, pygame.image.tobytes(surf, PIXEL_FORMAT)
+
+
+def bake_flipped(path):
+    # every cell is flipped in place so the sheet still slices like the original
+    surf = pygame.image.load(path).convert_alpha()
+    flipped = pygame.Surface(surf.get_size(), pygame.SRCALPHA)
+    for cell in slice_tilemap(surf, 4, 2).values():
+        flipped.blit(pygame.transform.flip(cell, True, False), cell.get_offset())
+    return {'kind': 'flipped', 'size': flipped.get_size()}, pygame.image.tobytes(flipped, PIXEL_FORMAT)
+
+
+def bake_outlines(path):
+    frames = slice_monster(pygame.image.load(path).convert_alpha())
+    states = list(frames)
+    alphas = numpy.stack([[create_outline_alpha(frame, BATTLE_OUTLINE_WIDTH) for frame in frames[state]]
+                          for state in states])
+    meta = {'kind': 'outlines', 'shape': alphas.shape, 'states': states, 'width': BATTLE_OUTLINE_WIDTH}
+    return meta, alphas.tobytes()
+
+
+def bake_map(path):
+    return {'kind': 'map'}, serialize_map(parse_tmx_map(path))
+
+
+def get_builders():
+    # (category, name, source path, builder) for everything that goes into the pack
+    builders = []
+    for category in ASSET_SOURCES:
+        if category == 'audio':
+            continue
+        for name, path in get_asset_files(category):
+            builders.append((category, name, path, bake_map if category == 'maps' else bake_image))
+            if category == 'monsters':
+                builders.append(('flipped', name, path, bake_flipped))
+                builders.append(('outlines', name, path, bake_outlines))
+
+    # tileset images that are not baked already for something else
+    baked = {normpath(path) for _, _, path, builder in builders if builder == bake_image}
+    for category in TILE_SOURCES:
+        for name, path in get_asset_files(category, TILE_SOURCES):
+            if normpath(path) not in baked and path.endswith('.png'):
+                builders.append((category, name, path, bake_image))
+    return builders
+
+
+def is_reusable(entry, source_hash):
+    if entry is None or entry['hash'] != source_hash or entry.get('version') != BAKE_VERSION:
+        return False
+    return entry.get('width', BATTLE_OUTLINE_WIDTH) == BATTLE_OUTLINE_WIDTH
+
+
+def bake(path=ASSET_PACK_PATH):
+    # only entries whose source file changed are built again, the rest is copied from the old pack
+    old_pack = AssetPack.open(path)
+    entries, blobs = {}, []
+    rebuilt = reused = 0
+    hashes = {}
+    for category, name, source, builder in get_builders():
+        key = AssetPack.get_key(category, name)
+        if source not in hashes:
+            hashes[source] = hash_map_file(source) if builder == bake_map else hash_file(source)
+        old_entry = old_pack.entries.get(key) if old_pack else None
+        if is_reusable(old_entry, hashes[source]):
+            entry, data = old_pack.read(category, name)
+            entry = dict(entry)
+            reused += 1
+        else:
+            entry, data = builder(source)
+            rebuilt += 1
+        source_stat = os.stat(source)
+        entry.update(source=source, hash=hashes[source], version=BAKE_VERSION, file_size=source_stat.st_size,
+                     mtime=source_stat.st_mtime_ns, length=len(data))
+        if builder == bake_map:
+            # the game only stats files, so the tilesets and their images are recorded next to the map
+            entry['dependencies'] = [(dependency, os.stat(dependency).st_size, os.stat(dependency).st_mtime_ns)
+                                     for dependency in get_map_dependencies(source)]
+        entries[key] = entry
+        blobs.append((entry, data))
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(bytes(PACK_HEADER.size))
+        for entry, data in blobs:
+            # aligned so pixel and alpha buffers can be used in place
+            file.write(bytes(-file.tell() % PACK_ALIGNMENT))
+            entry['offset'] = file.tell()
+            file.write(data)
+        index = json.dumps(entries).encode()
+        index_offset = file.tell()
+        file.write(index)
+        file.seek(0)
+        file.write(PACK_HEADER.pack(PACK_MAGIC, index_offset, len(index)))
+    # drop every view into the old pack before closing it
+    blobs.clear()
+    data = None
+    if old_pack:
+        old_pack.close()
+    os.replace(temp_path, path)
+    return rebuilt, reused
+
+
+if __name__ == '__main__':
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    start = perf_counter()
+    rebuilt, reused = bake()
+    print(f'baked {ASSET_PACK_PATH}: {rebuilt} rebuilt, {reused} reused in {perf_counter() - start:.2f}s')
@@ -8,6 +8,8 @@ from groups import BattleSprites
 from game_data import game_data
 from support import draw_bar
 from timer import Timer
+from text_renderer import text_renderer
+from frame_cache import frame_cache
 from random import choice
 from debug import debug
 
@@ -124,21 +126,23 @@ class Battle:
             self.monster_data['opponent'].pop(0)
 
     def create_monster(self, monster, index, pos_index, entity):
-        frames = self.monster_frames['monsters'][monster.name]
-        outline_frames = self.monster_frames['outlines'][monster.name]
         if entity == 'player':
             pos = list(self.battle_positions['left'].values())[pos_index]
             groups = (self.battle_sprites, self.player_sprites)
-            frames = {state: [pygame.transform.flip(frame, True, False)
-                              for frame in frames] for state, frames in frames.items()}
-            outline_frames = {state: [pygame.transform.flip(frame, True, False)
-                                      for frame in frames] for state, frames in outline_frames.items()}
+            facing = 'right'
         else:
             pos = list(self.battle_positions['right'].values())[pos_index]
             groups = (self.battle_sprites, self.opponent_sprites)
+            facing = 'left'
 
-        monster_sprite = MonsterSprite(pos, frames, groups, monster, index, pos_index, entity, self.apply_attack,
-                                       self.create_monster)
+        # scaled and flipped frames are shared between battles
+        size = (self.window_width // 10, self.window_width // 10)
+        frames = frame_cache.get_frames(self.monster_frames, 'monsters', monster.name, facing, size)
+        outline_frames = frame_cache.get_frames(self.monster_frames, 'outlines', monster.name, facing, size)
+        silhouette_frames = frame_cache.get_frames(self.monster_frames, 'silhouettes', monster.name, facing, size)
+
+        monster_sprite = MonsterSprite(pos, frames, silhouette_frames, groups, monster, index, pos_index, entity,
+                                       self.apply_attack, self.create_monster)
         MonsterOutlineSprite(monster_sprite, self.battle_sprites, outline_frames)
 
         # ui
@@ -332,7 +336,7 @@ class Battle:
                 text_color = COLORS[element]
             else:
                 text_color = COLORS['black']
-            text_surf = self.fonts['regular'].render(ability, False, text_color)
+            text_surf = text_renderer.render(self.fonts['regular'], ability, False, text_color)
             # rect
             text_rect = text_surf.get_frect(
                 center=bg_rect.midtop + vector(0, item_height / 2 + index * item_height))
@@ -366,7 +370,7 @@ class Battle:
                 text_color = COLORS['white']
             else:
                 text_color = COLORS['black']
-            text_surf = self.fonts['regular'].render(text, False, text_color)
+            text_surf = text_renderer.render(self.fonts['regular'], text, False, text_color)
             # rect
             text_rect = text_surf.get_frect(
                 center=bg_rect.midtop + vector(0, item_height / 2 + index * item_height))
@@ -409,8 +413,8 @@ class Battle:
                                                  item_height / 2 + index * item_height + v_offset))
 
             # name
-            name_surf = self.fonts['regular'].render(f'{monster.name} ({monster.level})', False,
-                                                     COLORS['white'] if selected else COLORS['black'])
+            name_surf = text_renderer.render(self.fonts['regular'], f'{monster.name} ({monster.level})', False,
+                                             COLORS['white'] if selected else COLORS['black'])
             name_rect = name_surf.get_frect(
                 topleft=(bg_rect.left + self.window_width * 0.05,
                          bg_rect.top + item_height / 3 + index * item_height + v_offset))
@@ -547,7 +551,7 @@ class Battle:
             self.monster_frames['attacks'][game_data.attack_data[attack]['animation']],
             self.battle_sprites
         )
-        self.sounds['sfx_' + game_data.attack_data[attack]['animation']].play()
+        game_data.attack_data[attack]['sound'].play()
 
         # Get correct attack damage amount (defense, element)
         attack_element = game_data.attack_data[attack]['element']
@@ -0,0 +1,609 @@
+import sys
+import json
+import pygame
+import subprocess
+import os
+import tempfile
+import time
+
+from time import perf_counter
+from settings import *
+from support import import_all_characters, import_coastline, import_monster, import_attacks, import_tmx_maps, \
+    import_folder, import_folder_dict, audio_importer
+from asset_loader import AssetLoader, queue_game_assets
+from asset_pack import AssetPack
+from asset_loader import read_baked_map, get_asset_files
+from map_prefetcher import MapPrefetcher
+from music import MusicPlayer
+from sound_effects import SoundEffects, load_sound
+from scene_cache import Scene, SceneCache
+from tile_map import TileLayer, parse_tmx_map, load_tmx_map, tile_images
+from pytmx.util_pygame import load_pygame
+from frame_cache import OutlineFrames, SilhouetteFrames, FrameCache
+from asset_cache import asset_cache
+from text_renderer import text_renderer
+from config_manager import ConfigManager
+from save_manager import SaveManager
+from save_format import SAVE_EXTENSION
+from autosave import Autosave, RECORD_DEFEATED, RECORD_WORLD
+from monster import Monster
+from game import Game
+from rewind import Rewind, encode_snapshot
+from save_format import COMPRESSION_TYPES, get_save_state, encode_save, decode_save
+
+
+# helpers
+def time_per_call(func, iterations):
+    start = perf_counter()
+    for i in range(iterations):
+        func(i)
+    return (perf_counter() - start) / iterations * 1_000_000
+
+
+def get_pixel_memory(frames):
+    # bytes of pixel data owned by the surfaces, subsurfaces only count their parent sheet once
+    owners = {}
+    pending = [frames]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, dict):
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            pending.extend(item)
+        elif isinstance(item, pygame.Surface):
+            owner = item.get_parent() or item
+            owners[id(owner)] = owner.get_width() * owner.get_height() * owner.get_bytesize()
+    return sum(owners.values())
+
+
+def report(title, results, unit='us/call'):
+    print(title)
+    for name, value in results.items():
+        print(f'    {name:<28}{value:>12.2f} {unit}')
+
+
+def get_resident_memory():
+    # linux only: anonymous pages are private to the process, file pages (the mapped pack) can be shared
+    memory = {}
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith(('RssAnon', 'RssFile')):
+                name, value = line.split(':')
+                memory[name] = int(value.split()[0])
+    return memory
+
+
+# benchmarks
+def benchmark_dynamic_text(iterations=20000):
+    surf = pygame.Surface((400, 48), pygame.SRCALPHA)
+    for name, size in (('small', int(1920 * 0.015 * 0.6)), ('regular', int(1920 * 0.015))):
+        font = text_renderer.get_font('PixeloidSans.ttf', size)
+        atlas = text_renderer.get_atlas(font, False, COLORS['black'])
+
+        def font_render(i):
+            surf.blit(font.render(f'HP: {i % 750}/750', False, COLORS['black']), (0, 0))
+
+        def atlas_draw(i):
+            atlas.draw(surf, f'HP: {i % 750}/750', topleft=(0, 0))
+
+        report(f'hp/ep counters ({name} font)', {
+            'Font.render': time_per_call(font_render, iterations),
+            'GlyphAtlas.draw': time_per_call(atlas_draw, iterations)
+        })
+
+
+def benchmark_sheet_slicing(repeat=5):
+    def import_sheets(subsurface):
+        return {
+            'characters': import_all_characters('..', 'graphics', 'characters', subsurface=subsurface),
+            'coast': import_coastline(24, 12, '..', 'graphics', 'tilesets', 'coast', subsurface=subsurface),
+            'monsters': import_monster(4, 2, '..', 'graphics', 'monsters', subsurface=subsurface),
+            'attacks': import_attacks('..', 'graphics', 'attacks', subsurface=subsurface)
+        }
+
+    times, memory = {}, {}
+    for name, subsurface in (('copied cells', False), ('subsurface views', True)):
+        start = perf_counter()
+        for _ in range(repeat):
+            frames = import_sheets(subsurface)
+        times[name] = (perf_counter() - start) / repeat * 1000
+        memory[name] = get_pixel_memory(frames) / 1024
+    report('sheet slicing (characters, coast, monsters, attacks)', times, 'ms')
+    report('sheet slicing pixel memory', memory, 'KiB')
+
+
+def benchmark_asset_loading(workers=(1, ASSET_LOADER_WORKERS)):
+    start = perf_counter()
+    import_tmx_maps('..', 'data', 'maps')
+    import_folder('..', 'graphics', 'tilesets', 'water')
+    import_coastline(24, 12, '..', 'graphics', 'tilesets', 'coast')
+    import_all_characters('..', 'graphics', 'characters')
+    import_folder_dict('..', 'graphics', 'icons')
+    import_monster(4, 2, '..', 'graphics', 'monsters')
+    import_attacks('..', 'graphics', 'attacks')
+    import_folder_dict('..', 'graphics', 'ui')
+    import_folder_dict('..', 'graphics', 'backgrounds')
+    import_folder('..', 'graphics', 'other', 'star animation')
+    audio_importer('..', 'audio')
+    results = {'sequential import': (perf_counter() - start) * 1000}
+
+    for count in workers:
+        loader = queue_game_assets(AssetLoader(count))
+        loader.run()
+        results[f'asset loader ({count} workers)'] = loader.timings['total'] * 1000
+    report('asset loading', results, 'ms')
+
+    # categories finish in parallel, so the wall time is when the last asset of a category was ready
+    stats = loader.get_stats()
+    report('asset loader wall time per category', {name: stat['wall'] * 1000 for name, stat in stats.items()}, 'ms')
+    report('asset loader decode time per category', {name: stat['decode'] * 1000 for name, stat in stats.items()
+                                                     if name != 'total'}, 'ms')
+
+
+def benchmark_asset_pack():
+    pack = AssetPack.open()
+    if not pack:
+        print('asset pack: no pack found, run bake.py first')
+        return
+
+    results, decode_times = {}, {}
+    for name, source in (('source files', None), ('asset pack', pack)):
+        start = perf_counter()
+        loader = queue_game_assets(AssetLoader(), source)
+        assets = loader.run()
+        outlines = OutlineFrames(assets['monsters'], BATTLE_OUTLINE_WIDTH, '..', 'graphics', 'monsters', pack=source)
+        for monster in assets['monsters']:
+            outlines[monster]
+        results[name] = (perf_counter() - start) * 1000
+        decode_times[name] = sum(stat['decode'] for category, stat in loader.get_stats().items()
+                                 if category != 'audio') * 1000
+    report('start-up assets with outlines', results, 'ms')
+    report('start-up decode time without audio', decode_times, 'ms')
+
+
+def benchmark_map_loading():
+    # every map loaded the way the game used to (pytmx cutting its own tiles) against the parsed map cache
+    maps = get_asset_files('maps')
+    pack = AssetPack.open()
+
+    def load_maps(load):
+        start = perf_counter()
+        loaded = {name: load(path, name) for name, path in maps}
+        return loaded, (perf_counter() - start) * 1000
+
+    def cut_tiles(loaded):
+        tiles = [surf for tmx_map in loaded.values() for layer in tmx_map.layers if hasattr(layer, 'tiles')
+                 for _, _, surf in layer.tiles()]
+        return tiles, get_pixel_memory(tiles) / 1024 / 1024
+
+    results = {}
+    pytmx_maps, results['pytmx'] = load_maps(lambda path, name: load_pygame(path))
+    _, results['parse'] = load_maps(lambda path, name: parse_tmx_map(path))
+    load_maps(lambda path, name: load_tmx_map(path))
+    _, results['map cache (warm)'] = load_maps(lambda path, name: load_tmx_map(path))
+    if pack:
+        _, results['asset pack'] = load_maps(lambda path, name: read_baked_map(pack, name))
+    report('loading every map', results, 'ms')
+
+    asset_cache.clear()
+    tile_images.sheets.clear()
+    memory = {'pytmx tiles': cut_tiles(pytmx_maps)[1], 'shared tiles': cut_tiles(load_maps(
+        lambda path, name: load_tmx_map(path))[0])[1]}
+    report('tile pixel memory of every map', memory, 'MiB')
+
+
+def benchmark_map_prefetch(maps=('world', 'fire', 'house')):
+    # the work left for the frame at the peak of the tint: building the map, taking a prefetched one, or a cached scene
+    assets = queue_game_assets(AssetLoader(lazy=LAZY_ASSETS), AssetPack.open()).run()
+    overworld_frames = {'water': [assets['water'][name] for name in sorted(assets['water'], key=int)],
+                        'coast': assets['coast']['coast']}
+    prefetcher = MapPrefetcher(assets['maps'], overworld_frames)
+    scene_cache = SceneCache()
+
+    def swap(tmx_map):
+        start = perf_counter()
+        scene = scene_cache.pop(tmx_map.name)
+        if scene is None:
+            scene = Scene(tmx_map.name)
+            for _ in scene.add_layout(prefetcher.get(tmx_map)):
+                pass
+        return scene, (perf_counter() - start) * 1000
+
+    for name in maps:
+        tmx_map = assets['maps'][name]
+        swap(tmx_map)  # cuts the tiles once so every case finds them cached
+        results = {'built at the swap': swap(tmx_map)[1]}
+        prefetcher.prefetch({name})
+        prefetcher.pending[name].result()
+        scene, results['prefetched'] = swap(tmx_map)
+        scene_cache.add(scene)
+        results['cached scene'] = swap(tmx_map)[1]
+        report(f'entering {name}', results, 'ms')
+
+
+def benchmark_music():
+    # songs decoded into sounds the way they used to be loaded, against opening them as a stream
+    music = MusicPlayer('..', 'audio')
+    times, memory = {}, {}
+    for name, path in music.tracks.items():
+        start = perf_counter()
+        sound = pygame.mixer.Sound(path)
+        times[f'{name} decoded'] = (perf_counter() - start) * 1000
+        memory[f'{name} decoded'] = sound.get_length() * pygame.mixer.get_init()[0] * pygame.mixer.get_init()[2] * \
+            abs(pygame.mixer.get_init()[1]) / 8 / 1024 / 1024
+        start = perf_counter()
+        music.start(name, 0)
+        times[f'{name} streamed'] = (perf_counter() - start) * 1000
+    music.stop()
+    report('starting a song', times, 'ms')
+    report('pcm kept in memory', memory, 'MiB')
+
+
+def benchmark_sound_effects(overlapping=12):
+    paths = dict(get_asset_files('audio'))
+    sounds, times = {}, {}
+    for name, path in paths.items():
+        if name.split('_')[0] == 'sfx':
+            start = perf_counter()
+            sounds[name] = pygame.mixer.Sound(path)
+            times[f'{name} decoded'] = (perf_counter() - start) * 1000
+            load_sound(path)
+            start = perf_counter()
+            load_sound(path)
+            times[f'{name} from the cache'] = (perf_counter() - start) * 1000
+    report('loading sound effects', times, 'ms')
+
+    # a battle where every monster attacks at once and a trainer notices the player in the middle of it
+    attack = {'animation': 'fire'}
+    dropped = 0
+    for index in range(overlapping):
+        if sounds['sfx_' + attack['animation']].play() is None:
+            dropped += 1
+    notice_dropped = sounds['sfx_notice'].play() is None
+    pygame.mixer.stop()
+
+    sound_effects = SoundEffects()
+    handles = sound_effects.get_handles(sounds)
+    sound_effects.resolve_attacks({'attack': attack}, handles)
+    for index in range(overlapping):
+        attack['sound'].play()
+    handles['sfx_notice'].play()
+    notice_playing = any(channel.get_busy() for channel in sound_effects.pools['world'].channels)
+    pygame.mixer.stop()
+    report(f'{overlapping} overlapping attack sounds', {
+        'dropped (any channel)': dropped,
+        'notice dropped (any channel)': notice_dropped,
+        'stolen (channel pool)': sound_effects.get_stats()['battle']['steals'],
+        'notice dropped (channel pool)': not notice_playing
+    }, '')
+
+    results = {
+        'name lookup': time_per_call(lambda i: sounds['sfx_' + attack['animation']], 100000),
+        'resolved handle': time_per_call(lambda i: attack['sound'], 100000)
+    }
+    report('finding the sound of an attack', results)
+
+
+def benchmark_lazy_assets():
+    results = {}
+    for source_name, pack in (('files', None), ('pack', AssetPack.open())):
+        if source_name == 'pack' and not pack:
+            continue
+        for name, lazy in (('eager', ()), ('lazy', LAZY_ASSETS)):
+            loader = queue_game_assets(AssetLoader(lazy=lazy), pack)
+            loader.run()
+            results[f'{name} from {source_name}'] = loader.timings['total'] * 1000
+
+        # what the first battle against two species costs on top of a lazy start
+        monsters, attacks = loader.assets['monsters'], loader.assets['attacks']
+        start = perf_counter()
+        for monster in ('Sparchu', 'Atrox'):
+            monsters[monster]
+        attacks['scratch']
+        results[f'first battle lookups ({source_name})'] = (perf_counter() - start) * 1000
+    report('start-up with lazy monster, attack, character and background assets', results, 'ms')
+
+
+def benchmark_asset_cache(budgets=(8, 32, 64)):
+    # a play session: walk through the maps, coming back to the world map, with a battle on every map
+    assets = queue_game_assets(AssetLoader(lazy=LAZY_ASSETS), AssetPack.open()).run()
+    monster_frames = {
+        'monsters': assets['monsters'],
+        'monsters_flipped': assets.get('flipped', {}),
+        'outlines': OutlineFrames(assets['monsters'], BATTLE_OUTLINE_WIDTH, '..', 'graphics', 'monsters'),
+        'silhouettes': SilhouetteFrames(assets['monsters'])
+    }
+    route = ['world', 'house', 'world', 'hospital', 'world', 'plant', 'world', 'water', 'world', 'fire', 'world',
+             'arena', 'world', 'hospital2', 'world']
+    party = ['Plumette', 'Sparchu', 'Finsta']
+    species = list(assets['monsters'])
+    frame_cache = FrameCache()
+
+    for budget in budgets:
+        asset_cache.clear()
+        asset_cache.set_budget(budget * 1024 * 1024)
+        before = asset_cache.get_stats()
+        start = perf_counter()
+        for index, map_name in enumerate(route):
+            tmx_map = assets['maps'][map_name]
+            for layer in tmx_map.layers:
+                if isinstance(layer, TileLayer):
+                    for _ in layer.tiles():
+                        pass
+            opponents = [species[(index * 2 + offset) % len(species)] for offset in range(2)]
+            for monster, facing in [(name, 'right') for name in party] + [(name, 'left') for name in opponents]:
+                for kind in ('monsters', 'outlines', 'silhouettes'):
+                    frame_cache.get_frames(monster_frames, kind, monster, facing, (192, 192))
+        stats = asset_cache.get_stats()
+        report(f'asset cache with a {budget} MiB budget', {
+            'hits': stats['hits'] - before['hits'],
+            'misses': stats['misses'] - before['misses'],
+            'evictions': stats['evictions'] - before['evictions'],
+            'kept (MiB)': stats['size'] / 1024 / 1024,
+            'time (ms)': (perf_counter() - start) * 1000
+        }, '')
+    asset_cache.set_budget(ASSET_CACHE_BUDGET)
+
+
+def measure_asset_memory(source):
+    # runs in its own process, see benchmark_resident_memory
+    before = get_resident_memory()
+    start = perf_counter()
+    queue_game_assets(AssetLoader(), AssetPack.open() if source == 'pack' else None).run()
+    after = get_resident_memory()
+    print(json.dumps({'time': perf_counter() - start, **{name: after[name] - before[name] for name in after}}))
+
+
+def benchmark_resident_memory():
+    if not AssetPack.open():
+        print('resident memory: no pack found, run bake.py first')
+        return
+    times, memory = {}, {}
+    for source in ('files', 'pack'):
+        output = subprocess.run([sys.executable, __file__, 'memory', source], capture_output=True, text=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        times[f'from {source}'] = result['time'] * 1000
+        memory[f'from {source} (private)'] = result['RssAnon']
+        memory[f'from {source} (mapped files)'] = result['RssFile']
+    report('asset loading in a fresh process', times, 'ms')
+    report('resident memory after loading', memory, 'KiB')
+
+
+def benchmark_display_probe():
+    # a fresh process for each, the screen size through a tkinter window the way config_manager used to read it
+    # against the config manager now, pygame is imported first since the game needs it either way
+    probes = {
+        'tkinter': 'from tkinter import Tk\napp = Tk()\napp.winfo_screenwidth(), app.winfo_screenheight()',
+        'sdl (config manager)': 'from config_manager import config_manager'
+    }
+    results = {}
+    for name, probe in probes.items():
+        code = f'import pygame, time\nstart = time.perf_counter()\n{probe}\nprint(time.perf_counter() - start)'
+        process = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        if process.returncode:
+            print(f'{name}: failed, {process.stderr.strip().splitlines()[-1]}')
+        else:
+            results[name] = float(process.stdout.splitlines()[-1]) * 1000
+    report('reading the screen size in a fresh process', results, 'ms')
+
+
+def benchmark_settings(steps=20):
+    # dragging the music slider from 0 to 1, one change per step
+    folder = tempfile.mkdtemp()
+    manager = ConfigManager(os.path.join(folder, 'settings.json'))
+    manager.flush()
+
+    start = perf_counter()
+    for step in range(steps):
+        manager.settings['audio']['music'] = step / steps
+        with open(manager.filepath, 'w') as file:
+            json.dump(manager.settings, file, indent=4)
+    sync_time = perf_counter() - start
+
+    writes = manager.writes
+    start = perf_counter()
+    for step in range(steps):
+        manager.update_setting('audio', 'music', step / steps)
+    debounced_time = perf_counter() - start
+    time.sleep(manager.save_delay / 1000 + 0.2)
+    report(f'a slider drag of {steps} steps', {
+        'written every step (ms)': sync_time * 1000,
+        'debounced (ms)': debounced_time * 1000,
+        'writes (debounced)': manager.writes - writes
+    }, '')
+
+
+def benchmark_saving(repeat=20):
+    # the bundled save slot, written in full on the main thread before against the snapshot now
+    with open('../save_data/saves/sfslot0v0.6.json', 'rb') as file:
+        json_data = file.read()
+    data = json.loads(json_data)
+    manager = SaveManager(filepath=tempfile.mkdtemp())
+    path = manager.get_full_path()
+
+    start = perf_counter()
+    for _ in range(repeat):
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=4)
+    sync_time = (perf_counter() - start) / repeat
+
+    start = perf_counter()
+    for _ in range(repeat):
+        manager.save(data, manager.filename)
+    snapshot_time = (perf_counter() - start) / repeat
+    manager.wait()
+    report('saving a game', {
+        'written on the main thread (ms)': sync_time * 1000,
+        'snapshot on the main thread (ms)': snapshot_time * 1000
+    }, '')
+
+    # the json save against the binary one with each compression
+    sizes = {'json': len(json_data)}
+    times = {'json': time_per_call(lambda i: get_save_state(json.loads(json_data)), 200)}
+    for compression in COMPRESSION_TYPES:
+        encoded = encode_save(get_save_state(data), compression)
+        sizes[compression] = len(encoded)
+        times[compression] = time_per_call(lambda i: decode_save(encoded), 200)
+    report('save file size', sizes, 'bytes')
+    report('reading a save file', times)
+
+
+def benchmark_slot_index(slots=10):
+    # opening the load menu with every slot used, each json save parsed before against the slot index now
+    with open('../save_data/saves/sfslot0v0.6.json', 'rb') as file:
+        json_data = file.read()
+    data = json.loads(json_data)
+    folder = tempfile.mkdtemp()
+    for slot in range(slots):
+        with open(os.path.join(folder, f'sfslot{slot}v{VERSION}.json'), 'wb') as file:
+            file.write(json_data)
+
+    start = perf_counter()
+    for slot in range(slots):
+        with open(os.path.join(folder, f'sfslot{slot}v{VERSION}.json')) as file:
+            json.load(file)
+    json_time = perf_counter() - start
+
+    manager = SaveManager(filepath=folder)
+    thumbnail = pygame.transform.smoothscale(pygame.image.load('../graphics/backgrounds/forest.png'), THUMBNAIL_SIZE)
+    for slot in range(slots):
+        manager.save(data, f'sfslot{slot}v{VERSION}{SAVE_EXTENSION}', thumbnail=thumbnail)
+    manager.wait()
+
+    manager = SaveManager(filepath=folder)
+    start = perf_counter()
+    manager.get_slots()
+    index_time = perf_counter() - start
+    for slot in range(slots):
+        manager.get_thumbnail(f'sfslot{slot}v{VERSION}{SAVE_EXTENSION}')
+    thumbnail_time = (perf_counter() - start - index_time) / slots
+    report(f'opening the load menu with {slots} slots', {
+        'json saves parsed (ms)': json_time * 1000,
+        'slot index read (ms)': index_time * 1000,
+        'a thumbnail decoded (ms)': thumbnail_time * 1000,
+        'index size (KiB)': os.path.getsize(os.path.join(folder, 'slots.idx')) / 1024
+    }, '')
+
+
+def benchmark_autosave(events=300, flush_every=10):
+    # a session of map changes, won battles and levelled monsters, every change saved
+    with open('../save_data/saves/sfslot0v0.6.json', 'rb') as file:
+        json_data = file.read()
+    data = json.loads(json_data)
+    autosave = Autosave(tempfile.mkdtemp())
+    monsters = {index: Monster(monster['name'], monster['level'])
+                for index, monster in enumerate(data['game_data']['player_monsters'])}
+    autosave.start(data, monsters)
+
+    record_time = 0
+    for event in range(events):
+        start = perf_counter()
+        if event % 3 == 0:
+            autosave.record(RECORD_WORLD, event, 'world', (event * 10.0, event * 5.0))
+        elif event % 3 == 1:
+            autosave.record(RECORD_DEFEATED, event, f'o{event % 7 + 1}')
+        else:
+            monsters[event % 3].update_exp(100)
+            autosave.record_party(monsters, event)
+        if event % flush_every == flush_every - 1:
+            autosave.flush(lambda: data)
+        record_time += perf_counter() - start
+    autosave.close(events)
+    SaveManager.executor.submit(lambda: None).result()
+
+    state = get_save_state(data)
+    report(f'autosaving {events} changes', {
+        'journal and snapshots (KiB)': autosave.bytes_written / 1024,
+        'a .sav per change (KiB)': len(encode_save(state)) * events / 1024,
+        'a json save per change (KiB)': len(json_data) * events / 1024,
+        'snapshots written': autosave.snapshots,
+        'main thread per change (us)': record_time / events * 1_000_000
+    }, '')
+
+    start = perf_counter()
+    Autosave(os.path.dirname(autosave.snapshot_path)).recover()
+    report('recovering the autosave', {'snapshot and journal replayed': (perf_counter() - start) * 1000}, 'ms')
+
+
+def benchmark_quick_save(repeat=200):
+    # F5 and F9, through the save file and a rebuilt map before against the snapshot kept in memory now
+    game = Game(lambda: None)
+    manager = SaveManager(filepath=tempfile.mkdtemp())
+    manager.save(game.get_save_data(), manager.filename)
+    state = manager.load(manager.filename)
+    start = perf_counter()
+    game.apply_state(state)
+    load_time = perf_counter() - start
+
+    save_time = time_per_call(lambda i: game.quick_save(), repeat)
+    quick_load_time = time_per_call(lambda i: game.quick_load(), repeat)
+    game.setup(game.tmx_maps['house'], 'world')
+    start = perf_counter()
+    game.quick_load()
+    other_map_time = perf_counter() - start
+    report('quick save and load', {
+        'disk load and setup (ms)': load_time * 1000,
+        'quick save (ms)': save_time / 1000,
+        'quick load (ms)': quick_load_time / 1000,
+        'quick load, other map (ms)': other_map_time * 1000
+    }, '')
+    game.close()
+    SaveManager.executor.submit(lambda: None).result()
+
+
+def benchmark_rewind(captures=600, fps=60):
+    # a player walking around for ten minutes while the party gains experience, a snapshot every interval
+    game = Game(lambda: None)
+    rewind = Rewind()
+    for capture in range(captures):
+        game.player.rect.x += 16 if capture % 40 < 20 else -16
+        game.player_monsters[capture % 3].exp += 10
+        game.play_time += REWIND_INTERVAL / 1000
+        rewind.capture(game, encounter=capture % 50 == 0)
+    stats = rewind.get_stats()
+    report(f'rewind, {captures} snapshots taken', {
+        'average capture (ms)': stats['average capture ms'],
+        'max capture (ms)': stats['max capture ms'],
+        f'per frame at {fps} fps (us)': stats['average capture ms'] * 1_000_000 / REWIND_INTERVAL / fps,
+        f'{stats["snapshots"]} kept (KiB)': stats['bytes'] / 1024,
+        'kept uncompressed (KiB)': len(encode_snapshot(game)) * stats['snapshots'] / 1024
+    }, '')
+
+    start = perf_counter()
+    rewind.get_state(0)
+    oldest_time = perf_counter() - start
+    start = perf_counter()
+    rewind.rewind(game, rewind.get_last_encounter())
+    undo_time = perf_counter() - start
+    report('rewinding', {
+        'reading the oldest snapshot': oldest_time * 1000,
+        'undoing the last encounter': undo_time * 1000
+    }, 'ms')
+    game.close()
+    SaveManager.executor.submit(lambda: None).result()
+
+
+if __name__ == '__main__':
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    if sys.argv[1:2] == ['memory']:
+        measure_asset_memory(sys.argv[2])
+        exit()
+    benchmark_dynamic_text()
+    benchmark_sheet_slicing()
+    benchmark_asset_loading()
+    benchmark_asset_pack()
+    benchmark_map_loading()
+    benchmark_map_prefetch()
+    benchmark_music()
+    benchmark_sound_effects()
+    benchmark_lazy_assets()
+    benchmark_asset_cache()
+    benchmark_resident_memory()
+    benchmark_display_probe()
+    benchmark_settings()
+    benchmark_saving()
+    benchmark_slot_index()
+    benchmark_autosave()
+    benchmark_quick_save()
+    benchmark_rewind()
@@ -1,63 +1,197 @@
 import pygame
 
-from tkinter import Tk as tk
 from settings import *
 import json
 import os
+import time
+import threading
+import atexit
 from debug import debug
 
 
+def get_screen_size():
+    # the desktop size from SDL, the video subsystem is enough for it and no window is opened
+    try:
+        if not pygame.display.get_init():
+            pygame.display.init()
+        sizes = pygame.display.get_desktop_sizes()
+        if sizes:
+            return sizes[0]
+        info = pygame.display.Info()
+        if info.current_w > 0 and info.current_h > 0:
+            return info.current_w, info.current_h
+    except pygame.error as e:
+        debug(f"Could not read the screen size: {e}")
+    # no display at all
+    return DEFAULT_SCREEN_SIZE
+
+
+def get_default_settings():
+    width, height = get_screen_size()
+    return {
+        'video': {
+            'window_width': width, 'window_height': height,
+            'fullscreen': True
+        },
+        'audio': {
+            'music': 0.,
+            'sfx': 0.
+        },
+        'controls': {
+            'up': [pygame.K_w, 0],
+            'down': [pygame.K_s, 0],
+            'left': [pygame.K_a, 0],
+            'right': [pygame.K_d, 0],
+            'confirm': [pygame.K_f, pygame.K_SPACE],
+            'inventory': [pygame.K_i, pygame.K_TAB],
+        },
+        'show_hitbox': False,
+        'show_debug': False
+    }
+
+
+def validate_setting(value, default, name):
+    # the loaded value if it has the shape of the default, the default otherwise
+    # missing and unknown keys are dropped, so an older or hand edited file still loads
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            debug(f"Invalid setting {name}, using the default")
+            return default
+        return {key: validate_setting(value[key], default[key], f'{name}.{key}') if key in value else default[key]
+                for key in default}
+    if isinstance(default, list):
+        if not isinstance(value, list) or len(value) != len(default):
+            debug(f"Invalid setting {name}, using the default")
+            return default
+        return [validate_setting(item, default_item, name) for item, default_item in zip(value, default)]
+    if isinstance(default, float) and type(value) in (int, float):
+        return min(max(float(value), 0.), 1.)
+    if type(value) is not type(default):
+        debug(f"Invalid setting {name}, using the default")
+        return default
+    return value
+
+
 class ConfigManager:
-    def __init__(self, filepath='../save_data/settings.json'):
+    # changes are kept in memory and written by a background thread once no new change came in for a while,
+    # so a slider drag is one write instead of one per step
+    def __init__(self, filepath='../save_data/settings.json', save_delay=SETTINGS_SAVE_DELAY):
         self.filepath = filepath
-        app = tk()
-        width, height = app.winfo_screenwidth(), app.winfo_screenheight()
-        self.settings = {
-            'video': {
-                'window_width': width, 'window_height': height,
-                'fullscreen': True
-            },
-            'audio': {
-                'music': 0.,
-                'sfx': 0.
-            },
-            'controls': {
-                'up': [pygame.K_w, 0],
-                'down': [pygame.K_s, 0],
-                'left': [pygame.K_a, 0],
-                'right': [pygame.K_d, 0],
-                'confirm': [pygame.K_f, pygame.K_SPACE],
-                'inventory': [pygame.K_i, pygame.K_TAB],
-            },
-            'show_hitbox': False
-        }
-        # self.load_settings()
+        self.save_delay = save_delay
+        self.settings = get_default_settings()
+
+        # the condition guards the settings and the pending save, the write lock keeps two writes apart
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.dirty = False
+        self.version = 0  # counts the changes, a write only clears dirty if no change came in while it ran
+        self.save_time = 0
+        self.writer = None
+        self.error = None  # the last failed write, debug draws on the screen so it is reported on the main thread
+
+        # stats
+        self.changes = 0
+        self.writes = 0
+
         self.ensure_directory_exists()
+        self.load_settings()
+        atexit.register(self.flush)
 
     def ensure_directory_exists(self):
-        if not os.path.exists(self.filepath):
-            os.makedirs(self.filepath)
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
 
     def load_settings(self):
         try:
             with open(self.filepath, 'r') as file:
-                self.settings = json.load(file)
+                settings = json.load(file)
         except FileNotFoundError:
-            self.save_settings()
+            self.schedule_save()
+            return
+        except (OSError, ValueError) as e:
+            # a broken file is left alone until the next change replaces it
+            debug(f"Could not read settings {self.filepath}: {e}")
+            return
+        defaults = self.settings
+        self.settings = validate_setting(settings, defaults, 'settings')
+
+        # a size saved on another screen that doesn't fit this one, the desktop size probed for the defaults instead
+        video = self.settings['video']
+        screen_width, screen_height = defaults['video']['window_width'], defaults['video']['window_height']
+        if video['window_width'] > screen_width or video['window_height'] > screen_height:
+            debug(f"Window size {video['window_width']}x{video['window_height']} does not fit the screen, "
+                  f"using {screen_width}x{screen_height}")
+            video['window_width'], video['window_height'] = screen_width, screen_height
 
     def save_settings(self):
-        with open(self.filepath, 'w') as file:
-            json.dump(self.settings, file, indent=4)
+        # the snapshot and the write happen under the write lock, so an older snapshot never replaces a newer one
+        with self.write_lock:
+            with self.condition:
+                if not self.dirty:
+                    return
+                data = json.dumps(self.settings, indent=4)
+                version = self.version
+            try:
+                with open(self.filepath + '.tmp', 'w') as file:
+                    file.write(data)
+                os.replace(self.filepath + '.tmp', self.filepath)
+                self.writes += 1
+            except OSError as e:
+                # the change stays pending and is tried again after the delay
+                self.error = f"Could not write settings {self.filepath}: {e}"
+                with self.condition:
+                    self.save_time = time.monotonic() + self.save_delay / 1000
+                return
+            with self.condition:
+                if self.version == version:
+                    self.dirty = False
+
+    def report_error(self):
+        if self.error:
+            debug(self.error)
+            self.error = None
+
+    def schedule_save(self):
+        with self.condition:
+            self.dirty = True
+            self.version += 1
+            self.save_time = time.monotonic() + self.save_delay / 1000
+            if not self.writer:
+                self.writer = threading.Thread(target=self.run_writer, name='settings', daemon=True)
+                self.writer.start()
+            self.condition.notify()
+
+    def run_writer(self):
+        while True:
+            with self.condition:
+                while not self.dirty:
+                    self.condition.wait()
+                # every change pushes the save back
+                remaining = self.save_time - time.monotonic()
+                if remaining > 0:
+                    self.condition.wait(remaining)
+                    continue
+            self.save_settings()
+
+    def flush(self):
+        # writes a pending change right away, used when the game closes
+        self.save_settings()
+        self.report_error()
 
     def update_setting(self, category, key, value, control=None):
+        self.report_error()
         if category in self.settings and key in self.settings[category]:
-            if control:
-                self.settings[category][key][control] = value
-            else:
-                self.settings[category][key] = value
-            self.save_settings()
+            with self.condition:
+                if control:
+                    self.settings[category][key][control] = value
+                else:
+                    self.settings[category][key] = value
+            self.changes += 1
+            self.schedule_save()
         else:
             debug("Invalid setting key or category")
 
+    def get_stats(self):
+        return {'changes': self.changes, 'writes': self.writes, 'pending': self.dirty}
+
 
 config_manager = ConfigManager()
@@ -1,12 +1,30 @@
 import pygame
+from collections import deque
+from text_renderer import text_renderer
 
 pygame.init()
-font = pygame.font.Font(None, 30)
+font = text_renderer.get_font(None, 30)
+errors = deque()  # errors of worker threads and from before the window exists, shown by report_errors
 
 
 def debug(info, y=10, x=10):
     display_surface = pygame.display.get_surface()
-    debug_surf = font.render(str(info), True, 'White')
+    if display_surface is None:
+        record_error(info)
+        return
+    debug_surf = text_renderer.render(font, str(info), True, 'White')
     debug_rect = debug_surf.get_rect(topleft=(x, y))
     pygame.draw.rect(display_surface, 'Black', debug_rect)
     display_surface.blit(debug_surf, debug_rect)
+
+
+def record_error(info):
+    # debug draws on the screen, so worker threads only record what went wrong
+    errors.append(info)
+
+
+def report_errors(y=40, x=10):
+    # on the main thread, below the line of the regular debug info
+    while errors:
+        debug(errors.popleft(), y, x)
+        y += font.get_linesize()
@@ -1,5 +1,6 @@
 from settings import *
 from timer import Timer
+from text_renderer import text_renderer
 
 
 class DialogueTree:
@@ -51,7 +52,7 @@ class DialogueSprite(pygame.sprite.Sprite):
         self.z = WORLD_LAYERS['top']
 
         # text
-        text_surf = font.render(message, False, COLORS['black'])
+        text_surf = text_renderer.render(font, message, False, COLORS['black'])
         padding = 10
         width = max(30, text_surf.get_width() + padding * 2)
         height = text_surf.get_height() + padding * 2
@@ -1,10 +1,11 @@
 from settings import *
 from timer import Timer
 from config_manager import config_manager
+from text_renderer import text_renderer
 
 
 class Evolution:
-    def __init__(self, frames, start_monster, end_monster, font, end_evolution, star_frames):
+    def __init__(self, frames, silhouette_frames, start_monster, end_monster, font, end_evolution, star_frames):
         self.display_surface = pygame.display.get_surface()
         self.start_monster_surf = pygame.transform.scale2x(frames[start_monster]['idle'][0])
         self.end_monster_surf = pygame.transform.scale2x(frames[end_monster]['idle'][0])
@@ -23,14 +24,14 @@ class Evolution:
         self.tint_surf.set_alpha(200)
 
         # white surf tint
-        self.start_monster_surf_white = pygame.mask.from_surface(self.start_monster_surf).to_surface()
-        self.start_monster_surf_white.set_colorkey('black')
+        self.start_monster_surf_white = pygame.transform.scale2x(silhouette_frames[start_monster]['idle'][0])
         self.tint_amount, self.tint_speed = 0, 80
         self.start_monster_surf_white.set_alpha(self.tint_amount)
 
         # text
-        self.start_text_surf = font.render(f'{start_monster} is evolving!', False, COLORS['black'])
-        self.end_text_surf = font.render(f'{start_monster} evolved into {end_monster}!', False, COLORS['black'])
+        self.start_text_surf = text_renderer.render(font, f'{start_monster} is evolving!', False, COLORS['black'])
+        self.end_text_surf = text_renderer.render(font, f'{start_monster} evolved into {end_monster}!', False,
+                                                  COLORS['black'])
 
     def display_stars(self, dt):
         if self.frame_index < len(self.star_frames) - 1:
@@ -0,0 +1,101 @@
+import os
+import numpy
+import pygame
+
+from settings import *
+from os.path import join, exists
+from support import hash_file, create_outline_alpha, alpha_to_surface, create_silhouette
+from asset_cache import asset_cache
+from debug import debug
+
+
+class FrameCache:
+    def __init__(self, cache=asset_cache):
+        # ('frames', kind, monster, state, facing, size) -> frames, shared and never modified
+        self.cache = cache
+
+    def get(self, monster_frames, kind, monster, state, facing, size):
+        key = ('frames', kind, monster, state, facing, tuple(size))
+        frames = self.cache.get(key)
+        if frames is None:
+            # monster sheets face left, frames facing right are flipped once here unless the pack has them baked
+            flipped = monster_frames.get(f'{kind}_flipped', {})
+            if facing == 'right' and monster in flipped:
+                frames = [pygame.transform.scale(frame, size) for frame in flipped[monster][state]]
+            else:
+                frames = []
+                for frame in monster_frames[kind][monster][state]:
+                    if facing == 'right':
+                        frame = pygame.transform.flip(frame, True, False)
+                    frames.append(pygame.transform.scale(frame, size))
+            frames = self.cache.add(key, tuple(frames))
+        return frames
+
+    def get_frames(self, monster_frames, kind, monster, facing, size):
+        return {state: self.get(monster_frames, kind, monster, state, facing, size)
+                for state in monster_frames[kind][monster]}
+
+
+class OutlineFrames(dict):
+    # outlines are created per monster on first access and kept on disk between launches
+    # nothing is stored in the dict itself, the asset cache decides how long outlines stay in memory
+    def __init__(self, frame_dict, width, *path, pack=None):
+        super().__init__()
+        self.frame_dict = frame_dict
+        self.pack = pack
+        self.width = width
+        self.path = path
+        self.cache_path = join('..', 'save_data', 'cache', 'outlines')
+
+    def __missing__(self, monster):
+        key = ('outlines', monster, self.width)
+        outlines = asset_cache.get(key)
+        if outlines is not None:
+            return outlines
+
+        alphas = self.pack.get_outlines('outlines', monster, self.width) \
+            if self.pack and self.pack.is_fresh('outlines', monster) else None
+        if alphas is None:
+            alphas = self.load(monster)
+        return asset_cache.add(key, {state: [alpha_to_surface(alpha) for alpha in state_alphas]
+                                     for state, state_alphas in alphas.items()})
+
+    def load(self, monster):
+        source_hash = hash_file(join(*self.path, f'{monster}.png'))
+        file_path = join(self.cache_path, f'{monster}_{source_hash}_{self.width}.npz')
+        if exists(file_path):
+            with numpy.load(file_path) as data:
+                alphas = {state: data[state] for state in data.files}
+        else:
+            alphas = {state: numpy.stack([create_outline_alpha(frame, self.width) for frame in frames])
+                      for state, frames in self.frame_dict[monster].items()}
+            self.save(file_path, alphas)
+        return alphas
+
+    @staticmethod
+    def save(file_path, alphas):
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path + '.tmp', 'wb') as file:
+                numpy.savez(file, **alphas)
+            os.replace(file_path + '.tmp', file_path)
+        except OSError as e:
+            debug(f"Could not write outline cache {file_path}: {e}")
+
+
+class SilhouetteFrames(dict):
+    # white silhouettes are created per monster on first access and kept by the asset cache
+    def __init__(self, frame_dict):
+        super().__init__()
+        self.frame_dict = frame_dict
+
+    def __missing__(self, monster):
+        key = ('silhouettes', monster)
+        silhouettes = asset_cache.get(key)
+        if silhouettes is None:
+            silhouettes = asset_cache.add(key, {state: [create_silhouette(frame) for frame in frames]
+                                                for state, frames in self.frame_dict[monster].items()})
+        return silhouettes
+
+
+frame_cache = FrameCache()
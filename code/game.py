@@ -5,15 +5,26 @@ import pygame.display
 from settings import *
 from config_manager import config_manager
 from save_manager import save_manager
+from save_format import SAVE_EXTENSION
+from autosave import Autosave, AUTOSAVE_SLOT, RECORD_DEFEATED, RECORD_WORLD
+from quick_save import QuickSave
+from rewind import Rewind
 from random import randint, uniform
+from time import perf_counter
 
 from support import *
 from game_data import game_data
 from timer import Timer
-
-from sprites import Sprite, AnimatedSprite, MonsterPatchSprite, BorderSprite, CollidableSprite, TransitionSprite
+from text_renderer import text_renderer
+from frame_cache import OutlineFrames, SilhouetteFrames
+from asset_loader import AssetLoader, queue_game_assets, prewarm
+from asset_pack import asset_pack
+from music import MusicPlayer
+from sound_effects import SoundEffects
+
+from map_prefetcher import MapPrefetcher
+from scene_cache import Scene, SceneCache
 from entities import Player, Characters
-from groups import AllSprites
 from monster import Monster
 from monster_inventory import MonsterInventory
 from battle import Battle
@@ -22,7 +33,7 @@ from options import Options
 
 from dialogue import DialogueTree
 
-from debug import debug
+from debug import debug, report_errors
 
 
 class Game:
@@ -38,13 +49,6 @@ class Game:
             2: Monster('Finsta', 5),
         }
 
-        # groups
-        self.collision_sprites = pygame.sprite.Group()
-        self.all_sprites = AllSprites(self.collision_sprites)
-        self.character_sprites = pygame.sprite.Group()
-        self.transition_sprites = pygame.sprite.Group()
-        self.encounter_sprites = pygame.sprite.Group()
-
         # transition / tint
         self.transition_target = None
         self.tint_surf = pygame.Surface((config_manager.settings['video']['window_width'],
@@ -56,9 +60,15 @@ class Game:
 
         # setup
         self.current_world = 'world'
+        self.play_time = 0
         self.import_assets()
+        self.map_prefetcher = MapPrefetcher(self.tmx_maps, self.overworld_frames)
+        self.scene_cache = SceneCache()
+        self.scene = None
+        self.setup_task = None  # (map name, setup generator) while a map is built during the tint
+        self.setup_frames = {}  # map name -> frames its last setup took
         self.setup(self.tmx_maps[self.current_world], 'start')
-        self.audio['music_overworld'].play(loops=-1, fade_ms=1000)
+        self.music.play('music_overworld', fade_in=1000)
 
         # overlays
         self.dialogue_tree = None
@@ -68,6 +78,7 @@ class Game:
 
         # encounter
         self.encounter_timer = Timer(250)
+        self.prewarm_timer = Timer(500, repeat=True, autostart=True, func=self.prewarm_assets)
         self.spawn_chance = 90
         self.evolution = None
         self.evolution_queue = []
@@ -87,130 +98,166 @@ class Game:
         self.closing = False
         self.running = True
 
-        if save_data:
-            self.load_game(save_data, True)
+        # quick save, kept in memory, shift + F5 also writes it to the quick save slot
+        self.quick_save_file = f'sfslotqs{VERSION}{SAVE_EXTENSION}'
+        self.quick_save_state = None
+
+        # rewind, F8 undoes the last encounter, F7 goes back a snapshot with the debug info shown
+        self.rewind = Rewind()
+        self.rewind_timer = Timer(REWIND_INTERVAL, repeat=True, autostart=True, func=self.capture_rewind)
+
+        # autosave, the last session is only recovered when the player picks it in the load menu
+        # a new game, or a slot that could not be loaded, replaces its journal
+        self.autosave = Autosave()
+        self.autosave_timer = Timer(JOURNAL_FLUSH_INTERVAL, repeat=True, autostart=True, func=self.flush_autosave)
+        if save_data == AUTOSAVE_SLOT:
+            state = self.autosave.recover()
+            if state:
+                self.apply_state(state)
+            self.autosave.start(self.get_save_data(), self.player_monsters)
+        elif not save_data or not self.load_game(save_data, True):
+            self.autosave.start(self.get_save_data(), self.player_monsters)
 
         self.start_up_delay = Timer(250, autostart=True)
 
+        # save indicator
+        self.save_message = ''
+        self.save_message_timer = Timer(1500)
+
     def import_assets(self):
-        self.tmx_maps = import_tmx_maps('..', 'data', 'maps')
+        # files are decoded on worker threads, conversion and slicing happen on the main thread
+        loader = queue_game_assets(AssetLoader(lazy=LAZY_ASSETS), asset_pack)
+        assets = loader.run(self.show_loading_screen)
+        self.asset_loader = loader
+
+        self.tmx_maps = assets['maps']
 
         self.overworld_frames = {
-            'water': import_folder('..', 'graphics', 'tilesets', 'water'),
-            'coast': import_coastline(24, 12, '..', 'graphics', 'tilesets', 'coast'),
-            'characters': import_all_characters('..', 'graphics', 'characters')
+            'water': [assets['water'][name] for name in sorted(assets['water'], key=int)],
+            'coast': assets['coast']['coast'],
+            'characters': assets['characters']
         }
 
         self.monster_frames = {
-            'icons': import_folder_dict('..', 'graphics', 'icons'),
-            'monsters': import_monster(4, 2, '..', 'graphics', 'monsters'),
-            'attacks': import_attacks('..', 'graphics', 'attacks'),
-            'ui': import_folder_dict('..', 'graphics', 'ui')
+            'icons': assets['icons'],
+            'monsters': assets['monsters'],
+            'attacks': assets['attacks'],
+            'ui': assets['ui'],
+            'monsters_flipped': assets.get('flipped', {})
         }
-        self.monster_frames['outlines'] = outline_creator(self.monster_frames['monsters'], 4)
+        self.monster_frames['outlines'] = OutlineFrames(self.monster_frames['monsters'], BATTLE_OUTLINE_WIDTH,
+                                                        '..', 'graphics', 'monsters', pack=asset_pack)
+        self.monster_frames['silhouettes'] = SilhouetteFrames(self.monster_frames['monsters'])
 
-        self.bg_frames = import_folder_dict('..', 'graphics', 'backgrounds')
+        self.bg_frames = assets['backgrounds']
 
-        self.star_animation_frames = import_folder('..', 'graphics', 'other', 'star animation')
+        self.star_animation_frames = [assets['stars'][name] for name in sorted(assets['stars'], key=int)]
 
         screen_width, _ = self.display_surface.get_size()
         font_size_ratio = 0.015
         font_size = int(screen_width * font_size_ratio)
         self.fonts = {
-            'dialogue': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), font_size),
-            'regular': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), font_size),
-            'small': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), int(font_size * 0.6)),
-            'bold': pygame.font.Font(join('..', 'graphics', 'fonts', 'dogicapixelbold.otf'), font_size)
+            'dialogue': text_renderer.get_font('PixeloidSans.ttf', font_size),
+            'regular': text_renderer.get_font('PixeloidSans.ttf', font_size),
+            'small': text_renderer.get_font('PixeloidSans.ttf', int(font_size * 0.6)),
+            'bold': text_renderer.get_font('dogicapixelbold.otf', font_size)
         }
 
-        self.audio = audio_importer('..', 'audio')
+        self.sound_effects = SoundEffects()
+        self.audio = self.sound_effects.get_handles(assets['audio'])
+        self.sound_effects.resolve_attacks(game_data.attack_data, self.audio)
+        self.music = MusicPlayer('..', 'audio')
         self.adjust_volume('music')
         self.adjust_volume('sfx')
 
     def setup(self, tmx_map, player_start_pos):
-        # clear the map
-        for group in (self.collision_sprites, self.all_sprites, self.character_sprites, self.transition_sprites):
-            group.empty()
-
-        # terrain
-        for layer in ['Terrain', 'Terrain Top']:
-            for x, y, surf in tmx_map.get_layer_by_name(layer).tiles():
-                Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, self.all_sprites, WORLD_LAYERS['bg'])
-
-        # water
-        for obj in tmx_map.get_layer_by_name('Water'):
-            for x in range(int(obj.x), int(obj.x + obj.width), TILE_SIZE):
-                for y in range(int(obj.y), int(obj.y + obj.height), TILE_SIZE):
-                    AnimatedSprite((x, y), self.overworld_frames['water'], self.all_sprites, WORLD_LAYERS['water'])
-
-        # coast
-        for obj in tmx_map.get_layer_by_name('Coast'):
-            terrain = obj.properties['terrain']
-            side = obj.properties['side']
-            AnimatedSprite((obj.x, obj.y), self.overworld_frames['coast'][terrain][side], self.all_sprites,
-                           WORLD_LAYERS['bg'])
-
-        # grass patches
-        for obj in tmx_map.get_layer_by_name('Monsters'):
-            MonsterPatchSprite((obj.x, obj.y), obj.image, (self.all_sprites, self.encounter_sprites),
-                               obj.properties['biome'], obj.properties['min_level'], obj.properties['max_level'],
-                               obj.properties['monsters'])
-
-        # collision objects
-        for obj in tmx_map.get_layer_by_name('Collisions'):
-            BorderSprite((obj.x, obj.y), pygame.Surface((obj.width, obj.height)), self.collision_sprites)
-
-        # objects
-        for obj in tmx_map.get_layer_by_name('Objects'):
-            if obj.name == 'top':
-                Sprite((obj.x, obj.y), obj.image, self.all_sprites, WORLD_LAYERS['top'])
-            else:
-                CollidableSprite((obj.x, obj.y), obj.image, (self.all_sprites, self.collision_sprites))
-
-        # transition objects
-        for obj in tmx_map.get_layer_by_name('Transition'):
-            TransitionSprite((obj.x, obj.y), (obj.width, obj.height), (obj.properties['target'], obj.properties['pos']),
-                             self.transition_sprites)
+        for _ in self.setup_steps(tmx_map, player_start_pos):
+            pass
+
+    def setup_steps(self, tmx_map, player_start_pos):
+        # a generator, every yield is a point where building the map can continue in the next frame
+        # the new map is built into its own groups, the current one stays active until both are swapped at the end
+
+        # terrain, water, grass patches, collisions, objects and transitions, usually prefetched in the background
+        scene = self.scene_cache.pop(tmx_map.name)
+        cached = scene is not None
+        if not cached:
+            layout = yield from self.map_prefetcher.get_steps(tmx_map)
+            scene = Scene(tmx_map.name)
+            yield from scene.add_layout(layout)
 
         # entities
-        player_created = False
+        player = None
         for obj in tmx_map.get_layer_by_name('Entities'):
             if obj.name == 'Player':
                 if obj.properties['pos'] == player_start_pos:
-                    self.player = Player(
+                    player = Player(
                         pos=(obj.x, obj.y),
                         frames=self.overworld_frames['characters']['player'],
-                        groups=self.all_sprites,
+                        groups=scene.all_sprites,
                         facing_direction=obj.properties['direction'],
-                        collision_sprites=self.collision_sprites
+                        collision_sprites=scene.collision_sprites
                     )
-                    player_created = True
-        for obj in tmx_map.get_layer_by_name('Entities'):
-            if obj.name != 'Player':
-                Characters(
-                    pos=(obj.x, obj.y),
-                    frames=self.overworld_frames['characters'][obj.properties['graphic']],
-                    groups=(self.all_sprites, self.collision_sprites, self.character_sprites),
-                    facing_direction=obj.properties['direction'],
-                    character_data=game_data.character_data[obj.properties['character_id']],
-                    player=self.player,
-                    create_dialogue=self.create_dialogue,
-                    collision_sprites=self.collision_sprites,
-                    radius=obj.properties['radius'],
-                    char_id=obj.properties['character_id'],
-                    sounds=self.audio
-                )
-
-        if not player_created:
+        if not player:
             # Create the player at the start position if not already created
-            self.player = Player(
+            player = Player(
                 pos=player_start_pos,
                 frames=self.overworld_frames['characters']['player'],
-                groups=self.all_sprites,
+                groups=scene.all_sprites,
                 facing_direction='down',  # Default facing direction
-                collision_sprites=self.collision_sprites
+                collision_sprites=scene.collision_sprites
             )
 
+        if cached:
+            # the characters are where they were left
+            for character in scene.character_sprites:
+                character.player = player
+        else:
+            for obj in tmx_map.get_layer_by_name('Entities'):
+                if obj.name != 'Player':
+                    Characters(
+                        pos=(obj.x, obj.y),
+                        frames=self.overworld_frames['characters'][obj.properties['graphic']],
+                        groups=(scene.all_sprites, scene.collision_sprites, scene.character_sprites),
+                        facing_direction=obj.properties['direction'],
+                        character_data=game_data.character_data[obj.properties['character_id']],
+                        player=player,
+                        create_dialogue=self.create_dialogue,
+                        collision_sprites=scene.collision_sprites,
+                        radius=obj.properties['radius'],
+                        char_id=obj.properties['character_id'],
+                        sounds=self.audio
+                    )
+                    yield
+
+        # keep the map that is left, coming back to it only swaps its groups in again
+        if self.scene:
+            self.player.kill()
+            self.scene_cache.add(self.scene)
+        self.scene = scene
+        self.player = player
+
+        # groups
+        self.collision_sprites = scene.collision_sprites
+        self.all_sprites = scene.all_sprites
+        self.character_sprites = scene.character_sprites
+        self.transition_sprites = scene.transition_sprites
+        self.encounter_sprites = scene.encounter_sprites
+
+        # start building the maps this one leads to, unless they are still cached
+        self.map_prefetcher.prefetch({sprite.target[0] for sprite in self.transition_sprites
+                                      if sprite.target[0] not in self.scene_cache})
+
+    def continue_setup(self):
+        # builds the map until this frame's budget is used up, true once it is complete
+        deadline = perf_counter() + SETUP_FRAME_BUDGET / 1000
+        self.setup_frames[self.setup_task[0]] += 1
+        for _ in self.setup_task[1]:
+            if perf_counter() >= deadline:
+                return False
+        self.setup_task = None
+        return True
+
     # dialogue system
     def input(self):
         if not self.dialogue_tree and not self.battle:
@@ -234,10 +281,16 @@ class Game:
                     self.options.run()
             if keys[pygame.K_F5]:
                 if not self.options_open and not self.monster_index_open:
-                    self.save_game(f'sfslotqs{VERSION}.json')
+                    self.quick_save(pygame.key.get_mods() & pygame.KMOD_SHIFT)
             if keys[pygame.K_F9]:
                 if not self.options_open and not self.monster_index_open:
-                    self.load_game(f'sfslotqs{VERSION}.json')
+                    self.load_game(self.quick_save_file)
+            if keys[pygame.K_F8]:
+                if not self.options_open and not self.monster_index_open:
+                    self.undo_encounter()
+            if keys[pygame.K_F7] and config_manager.settings['show_debug']:
+                if not self.options_open and not self.monster_index_open and len(self.rewind.snapshots) > 1:
+                    self.rewind_to(-2)
 
     def create_dialogue(self, character):
         if not self.dialogue_tree:
@@ -253,8 +306,8 @@ class Game:
                 monster.energy = monster.get_stat('max_energy')
             self.player.unblock()
         elif not character.character_data['defeated']:
-            self.audio['music_overworld'].fadeout(1000)
-            self.audio['music_battle'].play(loops=-1, fade_ms=4000)
+            self.rewind.capture(self, encounter=True)
+            self.music.play('music_battle', fade_in=4000, fade_out=1000)
 
             self.transition_target = Battle(
                 player_monsters=self.player_monsters,
@@ -299,8 +352,8 @@ class Game:
                 new_monster = Monster(sprites[0].monsters[monster_index], lvl)
                 wild_monsters[i] = new_monster
 
-            self.audio['music_overworld'].fadeout(1000)
-            self.audio['music_battle'].play(loops=-1, fade_ms=4000)
+            self.rewind.capture(self, encounter=True)
+            self.music.play('music_battle', fade_in=4000, fade_out=1000)
 
             # battle
             self.transition_target = Battle(
@@ -316,14 +369,38 @@ class Game:
             )
             self.tint_mode = 'tint'
 
+    def prewarm_assets(self):
+        # start decoding what the next battle needs while the player walks up to a patch or trainer
+        monsters = [monster.name for monster in self.player_monsters.values()]
+        biomes = []
+        player_pos = vector(self.player.rect.center)
+        for sprite in self.encounter_sprites:
+            if player_pos.distance_to(sprite.rect.center) < PREWARM_DISTANCE:
+                monsters.extend(sprite.monsters)
+                biomes.append(sprite.biome)
+        for character in self.character_sprites:
+            if character.monsters and not character.character_data['defeated'] and \
+                    player_pos.distance_to(character.rect.center) < PREWARM_DISTANCE:
+                monsters.extend(monster.name for monster in character.monsters.values())
+                biomes.append(character.character_data['biome'])
+
+        attacks = {game_data.attack_data[attack]['animation'] for monster in monsters
+                   for attack in game_data.monster_data[monster]['abilities'].values()}
+        prewarm(self.monster_frames['monsters'], monsters)
+        prewarm(self.monster_frames['monsters_flipped'], monsters)
+        prewarm(self.monster_frames['attacks'], attacks)
+        prewarm(self.bg_frames, biomes)
+
     def end_battle(self, character):
-        self.audio['music_battle'].fadeout(1000)
-        self.audio['music_overworld'].play(loops=-1, fade_ms=1000)
+        self.music.play('music_overworld', fade_in=1000, fade_out=1000)
 
         self.transition_target = 'level'
         self.tint_mode = 'tint'
+        # caught monsters and experience
+        self.autosave.record_party(self.player_monsters, self.play_time)
         if character:
             character.character_data['defeated'] = True
+            self.autosave.record(RECORD_DEFEATED, self.play_time, character.char_id)
             # game_data.character_data[character]
             self.create_dialogue(character)
         elif not self.evolution:
@@ -349,10 +426,17 @@ class Game:
                 elif self.transition_target == 'level':
                     self.battle = None
                 else:
-                    self.setup(self.tmx_maps[self.transition_target[0]], self.transition_target[1])
-                    self.current_world = self.transition_target[0]
-                self.tint_mode = 'untint'
-                self.transition_target = None
+                    # the screen stays dark while the map is built, a slice of it every frame
+                    name, pos = self.transition_target
+                    if not self.setup_task:
+                        self.setup_task = (name, self.setup_steps(self.tmx_maps[name], pos))
+                        self.setup_frames[name] = 0
+                    if self.continue_setup():
+                        self.current_world = name
+                        self.autosave.record(RECORD_WORLD, self.play_time, name, self.player.rect.center)
+                if not self.setup_task:
+                    self.tint_mode = 'untint'
+                    self.transition_target = None
 
         self.tint_progress = max(0, min(self.tint_progress, 255))
         self.tint_surf.set_alpha(self.tint_progress)
@@ -375,6 +459,7 @@ class Game:
             self.player.block()
             self.evolution = Evolution(
                 frames=self.monster_frames['monsters'],
+                silhouette_frames=self.monster_frames['silhouettes'],
                 start_monster=monster.name,
                 end_monster=monster.evolution[0],
                 font=self.fonts['bold'],
@@ -385,6 +470,7 @@ class Game:
 
     def end_evolution(self):
         self.evolution = None
+        self.autosave.record_party(self.player_monsters, self.play_time)
         if self.evolution_queue:
             self.start_evolution()
         else:
@@ -392,8 +478,32 @@ class Game:
                 self.player.unblock()
 
     def close(self):
+        self.autosave.close(self.play_time)
         self.running = False
 
+    def flush_autosave(self):
+        self.autosave.flush(self.get_save_data)
+
+    # rewind
+    def capture_rewind(self):
+        # only the overworld, battles and map changes are gone back to from the snapshot taken before them
+        if not self.battle and not self.evolution and not self.transition_target:
+            self.rewind.capture(self)
+            self.rewind_timer.duration = self.rewind.interval
+
+    def rewind_to(self, index):
+        self.rewind.rewind(self, index)
+        self.monster_index.index = 0
+        self.monster_index.selected_index = None
+        self.autosave.start(self.get_save_data(), self.player_monsters)
+
+    def undo_encounter(self):
+        index = self.rewind.get_last_encounter()
+        if index is not None:
+            self.rewind_to(index)
+            self.save_message = 'Encounter undone'
+            self.save_message_timer.activate()
+
     # settings
     def adjust_surfaces(self):
         self.tint_surf = pygame.transform.scale(self.tint_surf, (config_manager.settings['video']['window_width'],
@@ -405,14 +515,16 @@ class Game:
         font_size_ratio = 0.015
         font_size = int(screen_width * font_size_ratio)
         self.fonts = {
-            'dialogue': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), font_size),
-            'regular': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), font_size),
-            'small': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), int(font_size * 0.6)),
-            'bold': pygame.font.Font(join('..', 'graphics', 'fonts', 'dogicapixelbold.otf'), font_size)
+            'dialogue': text_renderer.get_font('PixeloidSans.ttf', font_size),
+            'regular': text_renderer.get_font('PixeloidSans.ttf', font_size),
+            'small': text_renderer.get_font('PixeloidSans.ttf', int(font_size * 0.6)),
+            'bold': text_renderer.get_font('dogicapixelbold.otf', font_size)
         }
         self.monster_index.adjust_fonts()
 
     def adjust_volume(self, category):
+        if category == 'music':
+            self.music.set_volume(config_manager.settings['audio'][category])
         for name, sound in self.audio.items():
             if name.split('_')[0] == category:
                 sound.set_volume(config_manager.settings['audio'][category])
@@ -421,74 +533,139 @@ class Game:
     def to_dict(self):
         return {
             'current_world': self.current_world,
+            'play_time': self.play_time,
             'player_monsters': [monster.to_dict() for monster in self.player_monsters.values()]
         }
 
-    def from_dict(self, data):
-        self.current_world = data['current_world']
-        self.player_monsters = data['player_monsters']
-
-    def save_game(self, file_name):
+    def get_save_data(self):
         characters_data = [character.to_dict() for character in self.character_sprites]
-        save_data = {
+        return {
             'game_data': self.to_dict(),
             'player': self.player.to_dict(),
             'characters': characters_data,
             'character_data': game_data.to_dict()
         }
-        save_manager.save(save_data, file_name)
+
+    def save_game(self, file_name):
+        save_manager.save(self.get_save_data(), file_name, self.saved, self.get_thumbnail())
+
+    def get_thumbnail(self):
+        # the world without the menus on top, drawn on its own surface so the screen is left alone
+        surf = pygame.Surface(self.display_surface.get_size())
+        self.all_sprites.draw(self.player, surf)
+        return pygame.transform.smoothscale(surf, THUMBNAIL_SIZE)
+
+    def saved(self, success):
+        self.save_message = 'Saved' if success else 'Save failed'
+        self.save_message_timer.activate()
+
+    def draw_save_indicator(self):
+        if save_manager.is_saving():
+            message = 'Saving...'
+        elif self.save_message_timer.active:
+            message = self.save_message
+        else:
+            return
+        text_surf = text_renderer.render(self.fonts['small'], message, False, COLORS['white'])
+        text_rect = text_surf.get_rect(bottomright=(self.display_surface.get_width() - 20,
+                                                    self.display_surface.get_height() - 20))
+        self.display_surface.blit(text_surf, text_rect)
+
+    def quick_save(self, persist=False):
+        self.quick_save_state = QuickSave(self)
+        if persist:
+            save_manager.save(self.quick_save_state.get_save_data(), self.quick_save_file, self.saved,
+                              self.get_thumbnail())
+        else:
+            self.save_message = 'Quick saved'
+            self.save_message_timer.activate()
+
+    def quick_load(self):
+        self.quick_save_state.restore(self)
+        self.rewind.clear()
+        self.monster_index.index = 0
+        self.monster_index.selected_index = None
+        self.autosave.start(self.get_save_data(), self.player_monsters)
 
     def load_game(self, file_name, exists=True):
+        # true if a state was loaded, the quick save slot is restored from memory if there is a quick save of this
+        # session
+        if file_name == self.quick_save_file and self.quick_save_state:
+            self.quick_load()
+            return True
         if exists:
-            save_data = save_manager.load(file_name)
-            if save_data:
-                if 'game_data' in save_data:
-                    self.from_dict(save_data['game_data'])
-                    if 'player_monsters' in save_data['game_data']:
-                        self.player_monsters = {}
-                        for i, monster_data in enumerate(save_data['game_data']['player_monsters']):
-                            monster = Monster(monster_data['name'], monster_data['level'])
-                            monster.from_dict(monster_data)
-                            self.player_monsters[i] = monster
-                if 'character_data' in save_data:
-                    game_data.from_dict(save_data['character_data'])
-
-                if 'player' in save_data:
-                    # Set up the game with the loaded tmx_map
-                    self.setup(self.tmx_maps[self.current_world], save_data['player']['pos'])
-
-                    self.player.from_dict(save_data['player'])
-                if 'characters' in save_data:
-                    for char_data, character in zip(save_data['characters'], self.character_sprites):
-                        character.from_dict(char_data)
-            self.monster_index = MonsterInventory(self.player_monsters, self.fonts, self.monster_frames)
+            state = save_manager.load(file_name)
+            if state:
+                self.apply_state(state)
+                self.rewind.clear()
+                self.autosave.start(self.get_save_data(), self.player_monsters)
+                return True
+        return False
+
+    def apply_state(self, state):
+        # a save only has what changes while playing, the rest is filled in from the fresh objects
+        self.current_world = state['current_world']
+        self.play_time = state['play_time']
+        self.player_monsters = {}
+        for i, monster_state in enumerate(state['player_monsters']):
+            monster = Monster(monster_state['name'], monster_state['level'])
+            monster.from_dict({**monster.to_dict(), **monster_state})
+            self.player_monsters[i] = monster
+        for name, character_data in game_data.character_data.items():
+            character_data['defeated'] = name in state['defeated']
+
+        # the saved characters replace the ones of every cached map
+        self.scene_cache.clear()
+        self.scene = None
+
+        # Set up the game with the loaded tmx_map
+        self.setup(self.tmx_maps[self.current_world], state['player']['pos'])
+
+        self.player.from_dict({**self.player.to_dict(), **state['player']})
+        for character_state, character in zip(state['characters'], self.character_sprites):
+            character.from_dict({**character.to_dict(), **character_state})
+        self.monster_index = MonsterInventory(self.player_monsters, self.fonts, self.monster_frames)
 
     # run function
-    def show_loading_screen(self):
-        loading_font = pygame.font.Font(None, 74)
-        loading_text = loading_font.render('Loading...', True, (255, 255, 255))
-        self.display_surface.blit(loading_text,
-                                  (self.display_surface.get_width() // 2 - loading_text.get_width() // 2,
-                                   self.display_surface.get_height() // 2 - loading_text.get_height() // 2))
+    def show_loading_screen(self, progress=0):
+        # keep the window responsive while the assets load
+        pygame.event.pump()
+        self.display_surface.fill('black')
+        loading_font = text_renderer.get_font(None, 74)
+        loading_text = text_renderer.render(loading_font, 'Loading...', True, (255, 255, 255))
+        loading_rect = loading_text.get_rect(center=(self.display_surface.get_width() // 2,
+                                                     self.display_surface.get_height() // 2))
+        self.display_surface.blit(loading_text, loading_rect)
+        bar_rect = pygame.FRect(0, 0, self.display_surface.get_width() // 3, 12).move_to(
+            midtop=(loading_rect.centerx, loading_rect.bottom + 20))
+        draw_bar(self.display_surface, bar_rect, progress, 1, COLORS['white'], COLORS['gray'], 4)
         pygame.display.flip()
 
     def run(self):
         while self.running:
             dt = self.clock.tick() / 1000
+            self.play_time += dt
             self.display_surface.fill('black')
 
             # event loop
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.autosave.close(self.play_time)
                     pygame.quit()
                     exit()
 
             # update
+            self.music.update()
+            save_manager.update()
+            self.save_message_timer.update()
+            self.autosave_timer.update()
+            self.rewind_timer.update()
             if self.start_up_delay.active:
                 self.start_up_delay.update()
 
             if not self.start_up_delay.active:
                 self.encounter_timer.update()
+                self.prewarm_timer.update()
                 if not self.player.blocked or self.monster_index_open:
                     self.input()
                 self.transition_check()
@@ -506,11 +683,19 @@ class Game:
                 if self.options_open:           self.options.run()
 
                 self.tint_screen(dt)
+                self.draw_save_indicator()
 
             debug_str = ''
+            if config_manager.settings['show_debug']:
+                frames = ', '.join(f'{name} {frames}' for name, frames in self.setup_frames.items())
+                rewind = self.rewind.get_stats()
+                debug_str = f'setup frames: {frames}, rewind: {rewind["snapshots"]} snapshots ' \
+                            f'{rewind["bytes"] / 1024:.1f} KiB {rewind["average capture ms"]:.3f} ms'
             debug(debug_str)
+            report_errors()
 
             pygame.display.flip()
 
         for audio in self.audio.values():
             audio.fadeout(500)
+        self.music.stop(500)
@@ -13,7 +13,9 @@ class AllSprites(pygame.sprite.Group):
         self.notice_surf = import_image('..', 'graphics', 'ui', 'notice')
         self.collision_sprites = collision_sprites
 
-    def draw(self, player):
+    def draw(self, player, surface=None):
+        # surface is the display unless something else should show the world, like a save thumbnail
+        surface = surface or self.display_surface
         window_width = config_manager.settings['video']['window_width']
         window_height = config_manager.settings['video']['window_height']
 
@@ -38,11 +40,11 @@ class AllSprites(pygame.sprite.Group):
                 # Check if the sprite is within the visible area
                 if sprite.rect.colliderect(visible_area):
                     if isinstance(sprite, Entity):
-                        self.display_surface.blit(self.shadow_surf, sprite.rect.topleft + self.offset + vector(40, 108))
-                    self.display_surface.blit(sprite.image, sprite.rect.topleft + self.offset)
+                        surface.blit(self.shadow_surf, sprite.rect.topleft + self.offset + vector(40, 108))
+                    surface.blit(sprite.image, sprite.rect.topleft + self.offset)
                     if sprite == player and player.noticed:
                         rect = self.notice_surf.get_rect(midbottom=sprite.rect.midtop)
-                        self.display_surface.blit(self.notice_surf, rect.topleft + self.offset)
+                        surface.blit(self.notice_surf, rect.topleft + self.offset)
 
         # Draw hitboxes for all sprites in collision_sprites and for player
         if config_manager.settings['show_hitbox']:
@@ -52,14 +54,14 @@ class AllSprites(pygame.sprite.Group):
                     hitbox_surf = pygame.Surface((int(hitbox_copy.width), int(hitbox_copy.height)), pygame.SRCALPHA)
                     hitbox_surf.fill((255, 0, 0, 128))  # Semi-transparent red for visibility
                     hitbox_rect = hitbox_copy.move(self.offset)  # Move the hitbox by the offset
-                    self.display_surface.blit(hitbox_surf, hitbox_rect.topleft)
+                    surface.blit(hitbox_surf, hitbox_rect.topleft)
             for sprite in self:
                 if sprite == player:
                     hitbox_copy = sprite.hitbox.copy()
                     hitbox_surf = pygame.Surface((int(hitbox_copy.width), int(hitbox_copy.height)), pygame.SRCALPHA)
                     hitbox_surf.fill((255, 0, 0, 128))  # Semi-transparent red for visibility
                     hitbox_rect = hitbox_copy.move(self.offset)  # Move the hitbox by the offset
-                    self.display_surface.blit(hitbox_surf, hitbox_rect.topleft)
+                    surface.blit(hitbox_surf, hitbox_rect.topleft)
                     break
 
 
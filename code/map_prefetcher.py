@@ -0,0 +1,128 @@
+from settings import *
+from sprites import Sprite, AnimatedSprite, MonsterPatchSprite, BorderSprite, CollidableSprite, TransitionSprite
+from concurrent.futures import ThreadPoolExecutor
+
+
+class MapLayout:
+    # the sprites of a map that don't depend on the game state (terrain, water, patches, collisions, objects)
+    # they are created without groups, so they can be built on any thread and handed to the game groups later
+    def __init__(self, name):
+        self.name = name
+        self.all_sprites = []
+        self.collision_sprites = []
+        self.encounter_sprites = []
+        self.transition_sprites = []
+
+    def add(self, sprite, *groups):
+        for group in groups:
+            group.append(sprite)
+
+
+def iter_map_layout(layout, tmx_map, overworld_frames):
+    # yields after every sprite, so the map can also be built a slice at a time on the main thread
+    # terrain
+    for layer in ['Terrain', 'Terrain Top']:
+        for x, y, surf in tmx_map.get_layer_by_name(layer).tiles():
+            layout.add(Sprite((x * TILE_SIZE, y * TILE_SIZE), surf, (), WORLD_LAYERS['bg']), layout.all_sprites)
+            yield
+
+    # water
+    for obj in tmx_map.get_layer_by_name('Water'):
+        for x in range(int(obj.x), int(obj.x + obj.width), TILE_SIZE):
+            for y in range(int(obj.y), int(obj.y + obj.height), TILE_SIZE):
+                layout.add(AnimatedSprite((x, y), overworld_frames['water'], (), WORLD_LAYERS['water']),
+                           layout.all_sprites)
+                yield
+
+    # coast
+    for obj in tmx_map.get_layer_by_name('Coast'):
+        terrain = obj.properties['terrain']
+        side = obj.properties['side']
+        layout.add(AnimatedSprite((obj.x, obj.y), overworld_frames['coast'][terrain][side], (), WORLD_LAYERS['bg']),
+                   layout.all_sprites)
+        yield
+
+    # grass patches
+    for obj in tmx_map.get_layer_by_name('Monsters'):
+        layout.add(MonsterPatchSprite((obj.x, obj.y), obj.image, (), obj.properties['biome'],
+                                      obj.properties['min_level'], obj.properties['max_level'],
+                                      obj.properties['monsters']), layout.all_sprites, layout.encounter_sprites)
+        yield
+
+    # collision objects
+    for obj in tmx_map.get_layer_by_name('Collisions'):
+        layout.add(BorderSprite((obj.x, obj.y), pygame.Surface((obj.width, obj.height)), ()), layout.collision_sprites)
+        yield
+
+    # objects
+    for obj in tmx_map.get_layer_by_name('Objects'):
+        if obj.name == 'top':
+            layout.add(Sprite((obj.x, obj.y), obj.image, (), WORLD_LAYERS['top']), layout.all_sprites)
+        else:
+            layout.add(CollidableSprite((obj.x, obj.y), obj.image, ()), layout.all_sprites, layout.collision_sprites)
+        yield
+
+    # transition objects
+    for obj in tmx_map.get_layer_by_name('Transition'):
+        layout.add(TransitionSprite((obj.x, obj.y), (obj.width, obj.height),
+                                    (obj.properties['target'], obj.properties['pos']), ()), layout.transition_sprites)
+        yield
+
+
+def build_map_layout(tmx_map, overworld_frames):
+    layout = MapLayout(tmx_map.name)
+    for _ in iter_map_layout(layout, tmx_map, overworld_frames):
+        pass
+    return layout
+
+
+class MapPrefetcher:
+    # builds the maps the current map leads to on a worker thread while the player walks
+    # a transition then only has to hand the finished sprites to the game groups
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='maps')
+
+    def __init__(self, tmx_maps, overworld_frames):
+        self.tmx_maps = tmx_maps
+        self.overworld_frames = overworld_frames
+        self.pending = {}  # map name -> future of its layout
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, names):
+        # maps the player can't reach from here anymore are dropped
+        for name in list(self.pending):
+            if name not in names:
+                self.pending.pop(name).cancel()
+        for name in names:
+            if name not in self.pending:
+                self.pending[name] = self.executor.submit(build_map_layout, self.tmx_maps[name], self.overworld_frames)
+
+    def get_steps(self, tmx_map):
+        # a generator returning the layout, it waits for a prefetch across frames instead of blocking
+        # a prefetch the worker has not started yet is taken back and built here
+        future = self.pending.pop(tmx_map.name, None)
+        if future and not future.cancel():
+            self.hits += 1
+            while not future.done():
+                yield
+            return future.result()
+
+        self.misses += 1
+        layout = MapLayout(tmx_map.name)
+        yield from iter_map_layout(layout, tmx_map, self.overworld_frames)
+        return layout
+
+    def get(self, tmx_map):
+        # the same, all at once
+        future = self.pending.pop(tmx_map.name, None)
+        if future and not future.cancel():
+            self.hits += 1
+            return future.result()
+
+        self.misses += 1
+        return build_map_layout(tmx_map, self.overworld_frames)
+
+    def get_stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'pending': len(self.pending)}
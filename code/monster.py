@@ -72,15 +72,18 @@ class Monster:
             'name': self.name,
             'level': self.level,
             'health': self.health,
+            'energy': self.energy,
             'abilities': self.abilities,
             'exp': self.exp
         }
 
     def from_dict(self, data):
         self.health = data['health']
+        self.energy = data.get('energy', self.energy)
         self.abilities = {int(k): v for k, v in data['abilities'].items()}
         self.exp = data['exp']
         self.level = data['level']
+        self.level_up = self.level * self.level * 150
         self.name = data['name']
 
     def __repr__(self):
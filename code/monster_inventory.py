@@ -1,9 +1,9 @@
 import pygame
-from os.path import join
 from settings import *
 from config_manager import config_manager
 from support import draw_bar
 from game_data import game_data
+from text_renderer import text_renderer
 
 
 class MonsterInventory:
@@ -83,7 +83,7 @@ class MonsterInventory:
             top = self.main_rect.top + index * self.item_height + v_offset
             item_rect = pygame.FRect(self.main_rect.left, top, self.list_width, self.item_height)
 
-            text_surf = self.fonts['regular'].render(monster.name, False, text_color)
+            text_surf = text_renderer.render(self.fonts['regular'], monster.name, False, text_color)
             text_rect = text_surf.get_frect(midleft=item_rect.midleft + vector(100, 0))
 
             icon_surf = self.icon_frames[monster.name]
@@ -181,14 +181,14 @@ class MonsterInventory:
         self.display_surface.blit(monster_surf, monster_rect)
 
         # name
-        name_surf = self.fonts['bold'].render(monster.name, False,
-                                              COLORS['white' if monster.element != 'normal' else 'black'])
+        name_surf = text_renderer.render(self.fonts['bold'], monster.name, False,
+                                         COLORS['white' if monster.element != 'normal' else 'black'])
         name_rect = name_surf.get_frect(topleft=top_rect.topleft + vector(10, 10))
         self.display_surface.blit(name_surf, name_rect)
 
         # level
-        level_surf = self.fonts['regular'].render(f'Level: {monster.level}', False,
-                                                  COLORS['white' if monster.element != 'normal' else 'black'])
+        level_surf = text_renderer.render(self.fonts['regular'], f'Level: {monster.level}', False,
+                                          COLORS['white' if monster.element != 'normal' else 'black'])
         level_rect = level_surf.get_frect(bottomleft=top_rect.bottomleft + vector(10, -14))
         self.display_surface.blit(level_surf, level_rect)
         # exp
@@ -202,8 +202,8 @@ class MonsterInventory:
         )
 
         # element
-        element_surf = self.fonts['regular'].render(f'{monster.element}', False,
-                                                    COLORS['white'] if monster.element != 'normal' else 'black')
+        element_surf = text_renderer.render(self.fonts['regular'], f'{monster.element}', False,
+                                            COLORS['white'] if monster.element != 'normal' else 'black')
         element_rect = element_surf.get_frect(bottomright=top_rect.bottomright + vector(-10, -10))
         self.display_surface.blit(element_surf, element_rect)
 
@@ -219,10 +219,9 @@ class MonsterInventory:
             bg_color=COLORS['black'],
             radius=2
         )
-        hp_text = self.fonts['regular'].render(f'HP: {int(monster.health)}/{monster.get_stat("max_health")}',
-                                               False, COLORS['white'])
-        hp_rect = hp_text.get_frect(midleft=hp_bar_rect.midleft + vector(10, 0))
-        self.display_surface.blit(hp_text, hp_rect)
+        text_renderer.get_atlas(self.fonts['regular'], False, COLORS['white']).draw(
+            self.display_surface, f'HP: {int(monster.health)}/{monster.get_stat("max_health")}',
+            midleft=hp_bar_rect.midleft + vector(10, 0))
 
     def draw_energy_bar(self, monster, bar_data):
         ep_bar_rect = pygame.FRect((0, 0), (bar_data['width'], bar_data['height'])).move_to(
@@ -236,15 +235,14 @@ class MonsterInventory:
             bg_color=COLORS['black'],
             radius=2
         )
-        ep_text = self.fonts['regular'].render(f'EP: {int(monster.energy)}/{monster.get_stat("max_energy")}',
-                                               False, COLORS['white'])
-        ep_rect = ep_text.get_frect(midleft=ep_bar_rect.midleft + vector(10, 0))
-        self.display_surface.blit(ep_text, ep_rect)
+        text_renderer.get_atlas(self.fonts['regular'], False, COLORS['white']).draw(
+            self.display_surface, f'EP: {int(monster.energy)}/{monster.get_stat("max_energy")}',
+            midleft=ep_bar_rect.midleft + vector(10, 0))
 
     def draw_stats(self, monster, main_rect, info_top):
         stats_rect = pygame.FRect(main_rect.left + main_rect.width * 0.05, info_top, main_rect.width * 0.42,
                                   main_rect.height * 0.5)
-        stats_text_surf = self.fonts['regular'].render('Stats', False, COLORS['white'])
+        stats_text_surf = text_renderer.render(self.fonts['regular'], 'Stats', False, COLORS['white'])
         stats_text_rect = stats_text_surf.get_frect(topleft=stats_rect.topleft)
         self.display_surface.blit(stats_text_surf, stats_text_rect)
 
@@ -260,7 +258,7 @@ class MonsterInventory:
             self.display_surface.blit(icon_surf, icon_rect)
 
             # text
-            stat_text_surf = self.fonts['regular'].render(stat, False, COLORS['white'])
+            stat_text_surf = text_renderer.render(self.fonts['regular'], stat, False, COLORS['white'])
             text_rect = stat_text_surf.get_frect(topleft=icon_rect.topleft + vector(20, -7))
             self.display_surface.blit(stat_text_surf, text_rect)
 
@@ -279,13 +277,13 @@ class MonsterInventory:
     def draw_abilities(self, monster, main_rect, info_top):
         abilities_rect = pygame.FRect(main_rect.left + main_rect.width * 0.55, info_top, main_rect.width * 0.4,
                                       main_rect.height * 0.5)
-        abilities_text_surf = self.fonts['regular'].render('Ability', False, COLORS['white'])
+        abilities_text_surf = text_renderer.render(self.fonts['regular'], 'Ability', False, COLORS['white'])
         ability_text_rect = abilities_text_surf.get_frect(topleft=abilities_rect.topleft)
         self.display_surface.blit(abilities_text_surf, ability_text_rect)
 
         for index, ability in enumerate(monster.get_abilities()):
             element = game_data.attack_data[ability]['element']
-            ability_text_surf = self.fonts['regular'].render(ability, False, COLORS['black'])
+            ability_text_surf = text_renderer.render(self.fonts['regular'], ability, False, COLORS['black'])
             x = abilities_rect.left + index % 2 * abilities_rect.width / 2
             y = (abilities_rect.top + ability_text_rect.height * 2) + (index//2 * (ability_text_surf.get_height() * 5))
             ability_rect = ability_text_surf.get_frect(topleft=(x, y))
@@ -305,10 +303,10 @@ class MonsterInventory:
         font_size_ratio = 0.015
         font_size = int(screen_width * font_size_ratio)
         self.fonts = {
-            'dialogue': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), font_size),
-            'regular': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), font_size),
-            'small': pygame.font.Font(join('..', 'graphics', 'fonts', 'PixeloidSans.ttf'), int(font_size * 0.6)),
-            'bold': pygame.font.Font(join('..', 'graphics', 'fonts', 'dogicapixelbold.otf'), font_size)
+            'dialogue': text_renderer.get_font('PixeloidSans.ttf', font_size),
+            'regular': text_renderer.get_font('PixeloidSans.ttf', font_size),
+            'small': text_renderer.get_font('PixeloidSans.ttf', int(font_size * 0.6)),
+            'bold': text_renderer.get_font('dogicapixelbold.otf', font_size)
         }
 
     # update
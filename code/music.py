@@ -0,0 +1,52 @@
+from settings import *
+from os.path import join
+from os import walk
+
+
+class MusicPlayer:
+    # songs are streamed from disk by pygame.mixer.music instead of being decoded into memory at start-up
+    # there is only one music stream, so a new song waits for the old one to fade out before it fades in
+    def __init__(self, *path):
+        self.tracks = {}
+        for folder_path, _, file_names in walk(join(*path)):
+            for file_name in file_names:
+                name = file_name.split('.')[0]
+                if name.split('_')[0] == 'music':
+                    self.tracks[name] = join(folder_path, file_name)
+        self.current = None
+        self.queued = None  # (name, fade in) of the song that starts once the current one has faded out
+
+    def play(self, name, fade_in=0, fade_out=0):
+        if self.queued or pygame.mixer.music.get_busy():
+            if name == self.current and not self.queued:
+                return
+            if not self.queued:
+                self.fadeout(fade_out)
+            self.queued = (name, fade_in)
+        else:
+            self.start(name, fade_in)
+
+    def start(self, name, fade_in):
+        pygame.mixer.music.load(self.tracks[name])
+        pygame.mixer.music.play(loops=-1, fade_ms=fade_in)
+        self.current = name
+        self.queued = None
+
+    @staticmethod
+    def fadeout(fade_out):
+        if fade_out:
+            pygame.mixer.music.fadeout(fade_out)
+        else:
+            pygame.mixer.music.stop()
+
+    def stop(self, fade_out=0):
+        self.queued = None
+        self.current = None
+        self.fadeout(fade_out)
+
+    def set_volume(self, volume):
+        pygame.mixer.music.set_volume(volume)
+
+    def update(self):
+        if self.queued and not pygame.mixer.music.get_busy():
+            self.start(*self.queued)
@@ -1,14 +1,17 @@
 import os.path
 import sys
-from tkinter import Tk as tk
+import time
 
 import pygame
 
-from debug import debug
+from debug import debug, report_errors
 from settings import *
-from os.path import join
-from config_manager import config_manager
+from config_manager import config_manager, get_screen_size
 from support import set_window_size
+from text_renderer import text_renderer
+from save_format import SAVE_EXTENSION, get_slot_info
+from save_manager import save_manager
+from autosave import Autosave, AUTOSAVE_SLOT
 
 
 class Options:
@@ -24,7 +27,7 @@ class Options:
         font_size_ratio = 0.015
         font_size = int(screen_width * font_size_ratio)
         self.fonts = {
-            'bold': pygame.font.Font(join('..', 'graphics', 'fonts', 'dogicapixelbold.otf'), font_size)
+            'bold': text_renderer.get_font('dogicapixelbold.otf', font_size)
         }
 
         # main menu
@@ -68,6 +71,10 @@ class Options:
         self.used_keys = list(key for key_pair in config_manager.settings['controls'].values() for key in key_pair)
         self.save_options = [f'Save Slot {i}' for i in range(10)]
         self.load_options = ['Quick Load'] + [f'Load Slot {i}' for i in range(10)]
+        if self.main_menu:
+            # a session that was not closed normally
+            self.load_options.append('Recover Autosave')
+        self.recovered_slot = None  # slot info of the autosave, read again every time the load menu is opened
 
         # controls
         self.action_of_new_key = None
@@ -107,9 +114,9 @@ class Options:
         for index, value in enumerate(selection_menu):
             selected = index == self.ui_indexes[selection_type]
 
-            # Text rendering
+            # Text rendering (with shadow effect)
             text_color = COLORS['dark'] if selected else COLORS['light']
-            text_surf = self.fonts['bold'].render(value, True, text_color)
+            text_surf = text_renderer.render(self.fonts['bold'], value, True, text_color, (COLORS['black'], (2, 2)))
 
             # Text rectangle
             text_rect = text_surf.get_rect(
@@ -123,13 +130,6 @@ class Options:
                 pygame.draw.rect(self.display_surface, COLORS['light'], text_bg_rect.inflate(-6, -6),
                                  border_radius=12)
 
-            # Shadow effect
-            shadow_offset = (2, 2)
-            shadow_color = COLORS['black']
-            shadow_rect = text_rect.move(*shadow_offset)
-            shadow_surf = self.fonts['bold'].render(value, True, shadow_color)
-            self.display_surface.blit(shadow_surf, shadow_rect)
-
             # Blit the text surface
             self.display_surface.blit(text_surf, text_rect)
 
@@ -159,20 +159,14 @@ class Options:
             thumb_rect = pygame.Rect(thumb_x - 10, slider_y - 5, 20, slider_height + 10)
             pygame.draw.rect(self.display_surface, COLORS['black' if selected else 'gray'], thumb_rect)
 
-            # Render slider value text
-            slider_value_text = self.fonts['bold'].render(
-                f"{slider_value: .2f}", True, COLORS['dark' if selected else 'light'])
+            # Render slider value text (with shadow effect)
+            slider_value_text = text_renderer.render(self.fonts['bold'], f"{slider_value: .2f}", True,
+                                                     COLORS['dark' if selected else 'light'],
+                                                     (COLORS['black'], (2, 2)))
             text_x = slider_x + slider_width / 2 - slider_value_text.get_width() / 2
             text_y = slider_y + slider_y_offset
             slider_value_text_rect = slider_value_text.get_rect().move((text_x, text_y))
 
-            # Shadow effect
-            shadow_offset = (2, 2)
-            shadow_color = COLORS['black']
-            shadow_rect = slider_value_text_rect.move(shadow_offset)
-            shadow_surf = self.fonts['bold'].render(f"{slider_value: .2f}", True, shadow_color)
-            self.display_surface.blit(shadow_surf, shadow_rect)
-
             # Blit value of slider
             self.display_surface.blit(slider_value_text, slider_value_text_rect)
 
@@ -191,19 +185,14 @@ class Options:
         item_height = round(bg_rect.height / len(self.controls_options), 2)
 
         # Shadow effect
-        shadow_offset = (2, 2)
-        shadow_color = COLORS['black']
+        shadow = (COLORS['black'], (2, 2))
 
         for index, control in enumerate(self.controls_options):
-            action_text_surf = self.fonts['bold'].render(control['action'], False, COLORS['light'])
+            action_text_surf = text_renderer.render(self.fonts['bold'], control['action'], False, COLORS['light'],
+                                                    shadow)
             action_text_rect = action_text_surf.get_rect(
                 center=action_bg_rect.midtop + vector(0, item_height / 2) + vector(0, index * item_height))
 
-            # Shadow effect
-            shadow_rect = action_text_rect.move(shadow_offset)
-            shadow_surf = self.fonts['bold'].render(control['action'], True, shadow_color)
-            self.display_surface.blit(shadow_surf, shadow_rect)
-
             self.display_surface.blit(action_text_surf, action_text_rect)
 
             selected_vertical = self.ui_indexes['controls']
@@ -235,18 +224,11 @@ class Options:
                         key_text_color = COLORS['light']
 
                     # Render key text
-                    if key_code:
-                        key_text_surf = self.fonts['bold'].render(pygame.key.name(key_code), False, key_text_color)
-                        shadow_surf = self.fonts['bold'].render(pygame.key.name(key_code), True, shadow_color)
-                    else:
-                        key_text_surf = self.fonts['bold'].render('Empty', False, key_text_color)
-                        shadow_surf = self.fonts['bold'].render('Empty', True, shadow_color)
+                    key_text = pygame.key.name(key_code) if key_code else 'Empty'
+                    key_text_surf = text_renderer.render(self.fonts['bold'], key_text, False, key_text_color, shadow)
                     key_text_rect = key_text_surf.get_rect(
                         center=(key_x + key_rect_width / 2, key_y + key_rect_height / 2))
 
-                    shadow_rect = key_text_rect.move(*shadow_offset)
-                    self.display_surface.blit(shadow_surf, shadow_rect)
-
                     self.display_surface.blit(key_text_surf, key_text_rect)
                 else:
                     double_keys = config_manager.settings['controls'][key_name]
@@ -259,18 +241,11 @@ class Options:
                     key_rect_height = item_height
 
                     # Render key text
-                    if key_code:
-                        key_text_surf = self.fonts['bold'].render(pygame.key.name(key_code), False, COLORS['light'])
-                        shadow_surf = self.fonts['bold'].render(pygame.key.name(key_code), True, shadow_color)
-                    else:
-                        key_text_surf = self.fonts['bold'].render('Empty', False, COLORS['light'])
-                        shadow_surf = self.fonts['bold'].render('Empty', True, shadow_color)
+                    key_text = pygame.key.name(key_code) if key_code else 'Empty'
+                    key_text_surf = text_renderer.render(self.fonts['bold'], key_text, False, COLORS['light'], shadow)
                     key_text_rect = key_text_surf.get_rect(
                         center=(key_x + key_rect_width / 2, key_y + key_rect_height / 2))
 
-                    shadow_rect = key_text_rect.move(*shadow_offset)
-                    self.display_surface.blit(shadow_surf, shadow_rect)
-
                     self.display_surface.blit(key_text_surf, key_text_rect)
 
         if selected_key:
@@ -292,15 +267,10 @@ class Options:
             y_pos = self.ui_indexes['controls'] * item_height + item_height / 2
             # new key
             new_key_text = pygame.key.name(new_key) if new_key else '[enter a \n\nnew key]'
-            new_key_text_surf = self.fonts['bold'].render(new_key_text, False, COLORS['dark'])
+            new_key_text_surf = text_renderer.render(self.fonts['bold'], new_key_text, False, COLORS['dark'], shadow)
             new_key_text_rect = new_key_text_surf.get_rect(
                 center=keys_bg_rect.topleft + vector(x_pos, y_pos))
 
-            shadow_surf = self.fonts['bold'].render(pygame.key.name(new_key) if new_key else '[enter a \n\nnew key]',
-                                                    True, shadow_color)
-            shadow_rect = new_key_text_rect.move(*shadow_offset)
-            self.display_surface.blit(shadow_surf, shadow_rect)
-
             self.display_surface.blit(new_key_text_surf, new_key_text_rect)
 
     def draw_save_menu(self):
@@ -314,8 +284,9 @@ class Options:
 
         for index, value in enumerate(self.save_options):
             selected = index == self.ui_indexes['save']
-            # text
-            text_surf = self.fonts['bold'].render(value, False, COLORS['dark' if selected else 'light'])
+            # text (with shadow effect)
+            text_surf = text_renderer.render(self.fonts['bold'], value, False, COLORS['dark' if selected else 'light'],
+                                             (COLORS['black'], (2, 2)))
             # rect
             text_rect = text_surf.get_frect(center=bg_rect.midtop + vector(0, item_height / 2 + index * item_height))
             text_bg_rect = pygame.FRect((0, 0), (width, item_height)).move_to(center=text_rect.center)
@@ -325,15 +296,10 @@ class Options:
                 pygame.draw.rect(self.display_surface, COLORS['light'], text_bg_rect.inflate(-6, -6),
                                  border_radius=12)
 
-            # Shadow effect
-            shadow_offset = (2, 2)
-            shadow_color = COLORS['black']
-            shadow_rect = text_rect.move(*shadow_offset)
-            shadow_surf = self.fonts['bold'].render(value, True, shadow_color)
-            self.display_surface.blit(shadow_surf, shadow_rect)
-
             self.display_surface.blit(text_surf, text_rect)
 
+        self.draw_slot_preview(self.get_slot_file('save'), bg_rect)
+
     def draw_load_menu(self):
         width, height = config_manager.settings['video']['window_width'] * 0.4, \
                         config_manager.settings['video']['window_height'] * 0.8
@@ -345,8 +311,9 @@ class Options:
 
         for index, value in enumerate(self.load_options):
             selected = index == self.ui_indexes['load']
-            # text
-            text_surf = self.fonts['bold'].render(value, False, COLORS['dark' if selected else 'light'])
+            # text (with shadow effect)
+            text_surf = text_renderer.render(self.fonts['bold'], value, False, COLORS['dark' if selected else 'light'],
+                                             (COLORS['black'], (2, 2)))
             # rect
             text_rect = text_surf.get_frect(center=bg_rect.midtop + vector(0, item_height / 2 + index * item_height))
             text_bg_rect = pygame.FRect((0, 0), (width, item_height)).move_to(center=text_rect.center)
@@ -356,14 +323,62 @@ class Options:
                 pygame.draw.rect(self.display_surface, COLORS['light'], text_bg_rect.inflate(-6, -6),
                                  border_radius=12)
 
-            # Shadow effect
-            shadow_offset = (2, 2)
-            shadow_color = COLORS['black']
-            shadow_rect = text_rect.move(*shadow_offset)
-            shadow_surf = self.fonts['bold'].render(value, True, shadow_color)
-            self.display_surface.blit(shadow_surf, shadow_rect)
+            self.display_surface.blit(text_surf, text_rect)
 
+        self.draw_slot_preview(self.get_slot_file('load'), bg_rect)
+
+    def draw_slot_preview(self, file_name, menu_rect):
+        # next to the menu, everything comes from the slot index instead of the save itself
+        width = config_manager.settings['video']['window_width'] * 0.25
+        bg_rect = pygame.FRect(menu_rect.right + config_manager.settings['video']['window_width'] * 0.02,
+                               menu_rect.top, width, menu_rect.height * 0.75)
+        pygame.draw.rect(self.display_surface, COLORS['light-gray'], bg_rect, 0, 12)
+        shadow = (COLORS['black'], (2, 2))
+
+        slot = self.get_recovered_slot() if file_name == AUTOSAVE_SLOT else save_manager.get_slots().get(file_name)
+        if not slot:
+            text_surf = text_renderer.render(self.fonts['bold'], 'Empty', False, COLORS['light'], shadow)
+            self.display_surface.blit(text_surf, text_surf.get_frect(center=bg_rect.center))
+            return
+
+        top = bg_rect.top + 12
+        thumbnail = save_manager.get_thumbnail(file_name, int(bg_rect.width - 24)) \
+            if file_name != AUTOSAVE_SLOT else None
+        if thumbnail:
+            self.display_surface.blit(thumbnail, (bg_rect.left + 12, top))
+            top += thumbnail.get_height() + 12
+
+        minutes, seconds = divmod(int(slot['play_time']), 60)
+        hours, minutes = divmod(minutes, 60)
+        lines = [slot['world'], f'{hours}:{minutes:02}:{seconds:02}',
+                 time.strftime('%Y-%m-%d %H:%M', time.localtime(slot['timestamp']))]
+        lines += [f'{name} lv {level}' for name, level in slot['party']]
+        for line in lines:
+            text_surf = text_renderer.render(self.fonts['bold'], line, False, COLORS['light'], shadow)
+            text_rect = text_surf.get_frect(midtop=(bg_rect.centerx, top))
+            if text_rect.bottom > bg_rect.bottom:
+                break
             self.display_surface.blit(text_surf, text_rect)
+            top = text_rect.bottom + 8
+
+    def get_recovered_slot(self):
+        if self.recovered_slot is None:
+            autosave = Autosave()
+            state = autosave.recover()
+            path = autosave.journal_path if os.path.exists(autosave.journal_path) else autosave.snapshot_path
+            self.recovered_slot = get_slot_info(state, os.path.getmtime(path)) if state else {}
+        return self.recovered_slot
+
+    def get_slot_file(self, mode):
+        # the load menu starts with the quick save, the main menu's ends with the autosave
+        index = self.ui_indexes[mode]
+        if mode == 'load':
+            if index == 0:
+                return f"sfslotqs{VERSION}{SAVE_EXTENSION}"
+            if self.main_menu and index == len(self.load_options) - 1:
+                return AUTOSAVE_SLOT
+            index -= 1
+        return f"sfslot{index}v{VERSION}{SAVE_EXTENSION}"
 
     # input
     def input(self):
@@ -471,6 +486,7 @@ class Options:
                             self.selection_mode = 'save'
                         case 2:
                             self.selection_mode = 'load'
+                            self.recovered_slot = None
                         case 3:
                             self.selection_mode = 'settings'
                         case 4:
@@ -497,8 +513,7 @@ class Options:
                             self.selection_mode = 'resolution'
                         case 1:
                             if not pygame.display.is_fullscreen():
-                                app = tk()
-                                width, height = app.winfo_screenwidth(), app.winfo_screenheight()
+                                width, height = get_screen_size()
                                 set_window_size(width, height)
                                 config_manager.update_setting('video', 'fullscreen', True)
                                 pygame.display.toggle_fullscreen()
@@ -520,13 +535,12 @@ class Options:
                     self.action_of_new_key = self.controls_options[self.ui_indexes[self.selection_mode]]['action']
                     self.selection_mode = 'control_selection'
                 case 'save':
-                    self.funcs['save'](f"sfslot{self.ui_indexes['save']}v{VERSION}.json")
+                    self.funcs['save'](self.get_slot_file('save'))
                 case 'load':
                     if 'load' in self.funcs:
-                        if self.ui_indexes['load'] == 0:
-                            filename = f"sfslotqs{VERSION}.json"
-                        else:
-                            filename = f"sfslot{self.ui_indexes['load'] - 1}v{VERSION}.json"
+                        filename = self.get_slot_file('load')
+                        if filename == AUTOSAVE_SLOT and not self.get_recovered_slot():
+                            return
                         if filename:
                             self.funcs['load'](filename)
                         else:
@@ -573,7 +587,7 @@ class Options:
         font_size_ratio = 0.015
         font_size = int(screen_width * font_size_ratio)
         self.fonts = {
-            'bold': pygame.font.Font(join('..', 'graphics', 'fonts', 'dogicapixelbold.otf'), font_size)
+            'bold': text_renderer.get_font('dogicapixelbold.otf', font_size)
         }
 
     def update_used_keys(self):
@@ -600,5 +614,6 @@ class Options:
             # drawing
             self.display_surface.blit(self.bg_surf, (0, 0))
             self.draw_ui()
+            report_errors()
 
             pygame.display.update()
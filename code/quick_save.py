@@ -0,0 +1,53 @@
+from settings import *
+from game_data import game_data
+
+
+class QuickSave:
+    # the state of the game kept in memory, restoring it puts the same objects back instead of building them again
+    # everything is a to_dict of its object, so it can also be written as a save file
+    def __init__(self, game):
+        self.world = game.current_world
+        self.scene = game.scene
+        self.play_time = game.play_time
+        self.player = game.player.to_dict()
+        self.monsters = [(index, monster, monster.to_dict()) for index, monster in game.player_monsters.items()]
+        self.characters = [(character, character.to_dict()) for character in game.character_sprites]
+        self.defeated = {name: character_data['defeated'] for name, character_data in game_data.character_data.items()}
+
+    def get_save_data(self):
+        # the layout of Game.get_save_data
+        return {
+            'game_data': {
+                'current_world': self.world,
+                'play_time': self.play_time,
+                'player_monsters': [data for _, _, data in self.monsters]
+            },
+            'player': self.player,
+            'characters': [data for _, data in self.characters],
+            'character_data': {'character_data': {name: {'defeated': defeated}
+                                                  for name, defeated in self.defeated.items()}}
+        }
+
+    def restore(self, game):
+        for name, defeated in self.defeated.items():
+            game_data.character_data[name]['defeated'] = defeated
+
+        # the same dict, the monster inventory keeps showing it
+        game.player_monsters.clear()
+        for index, monster, data in self.monsters:
+            monster.from_dict(data)
+            game.player_monsters[index] = monster
+        game.play_time = self.play_time
+
+        # a map left since is swapped back in from the scene cache, or built again if it was dropped from it
+        # the same map built again after the player came back to it is kept, its characters are reset in place
+        if game.current_world != self.world:
+            game.setup(game.tmx_maps[self.world], self.player['pos'])
+            game.current_world = self.world
+        if game.scene is self.scene:
+            for character, data in self.characters:
+                character.from_dict(data)
+        else:
+            for (_, data), character in zip(self.characters, game.character_sprites):
+                character.from_dict(data)
+        game.player.from_dict(self.player)
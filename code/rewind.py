@@ -0,0 +1,159 @@
+import zlib
+from collections import deque
+from time import perf_counter
+from settings import *
+from save_format import SaveWriter, SaveReader
+from monster import Monster
+
+
+def encode_snapshot(game, encounter=False):
+    # the to_dict of the player, the characters of the current map and the party, in the order of the save files
+    writer = SaveWriter()
+    writer.pack('<?d', encounter, game.play_time)
+    writer.string(game.current_world)
+
+    player = game.player.to_dict()
+    writer.pack('<dd?', *player['pos'], player['noticed'])
+    writer.string(player['facing_direction'])
+
+    characters = [character.to_dict() for character in game.character_sprites]
+    writer.pack('<H', len(characters))
+    for character in characters:
+        writer.pack('<dd????', *character['pos'], character['has_moved'], character['can_rotate'],
+                    character['has_noticed'], character['character_data']['defeated'])
+        writer.string(character['facing_direction'])
+
+    writer.pack('<H', len(game.player_monsters))
+    for index, monster in game.player_monsters.items():
+        monster = monster.to_dict()
+        writer.pack('<H', index)
+        writer.string(monster['name'])
+        writer.pack('<Hddd', monster['level'], monster['health'], monster['energy'], monster['exp'])
+    return bytes(writer.body)
+
+
+def decode_snapshot(data):
+    reader = SaveReader(data)
+    encounter, play_time = reader.unpack('<?d')
+    state = {'encounter': encounter, 'play_time': play_time, 'current_world': reader.string()}
+
+    *pos, noticed = reader.unpack('<dd?')
+    state['player'] = {'pos': tuple(pos), 'noticed': noticed, 'facing_direction': reader.string()}
+
+    state['characters'] = []
+    for _ in range(*reader.unpack('<H')):
+        *pos, has_moved, can_rotate, has_noticed, defeated = reader.unpack('<dd????')
+        state['characters'].append({'pos': tuple(pos), 'has_moved': has_moved, 'can_rotate': can_rotate,
+                                    'has_noticed': has_noticed, 'defeated': defeated,
+                                    'facing_direction': reader.string()})
+
+    state['player_monsters'] = {}
+    for _ in range(*reader.unpack('<H')):
+        index, = reader.unpack('<H')
+        name = reader.string()
+        level, health, energy, exp = reader.unpack('<Hddd')
+        state['player_monsters'][index] = {'name': name, 'level': level, 'health': health, 'energy': energy,
+                                           'exp': exp}
+    return state
+
+
+def compress(data, base=None):
+    # a snapshot compressed with the one before it as the dictionary only stores what changed
+    compressor = zlib.compressobj(zdict=base) if base else zlib.compressobj()
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data, base=None):
+    decompressor = zlib.decompressobj(zdict=base) if base else zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+class Rewind:
+    # a ring of snapshots of the overworld, for going back to one while debugging or to undo the last encounter
+    # the oldest snapshot is compressed on its own, every other one against the one before it
+    def __init__(self, size=REWIND_SNAPSHOTS):
+        self.size = size
+        self.snapshots = deque()  # (taken before an encounter, compressed snapshot), oldest first
+        self.last = None  # the newest snapshot uncompressed, the base of the next one
+        self.interval = REWIND_INTERVAL  # milliseconds until the next snapshot, longer if they get slow
+
+        # stats
+        self.captures = 0
+        self.capture_time = 0
+        self.max_capture_time = 0
+        self.recent_time = 0
+
+    def capture(self, game, encounter=False):
+        start = perf_counter()
+        data = encode_snapshot(game, encounter)
+        self.snapshots.append((encounter, compress(data, self.last)))
+        self.last = data
+        if len(self.snapshots) > self.size:
+            # the second snapshot becomes the oldest one, so it is compressed on its own again
+            oldest = decompress(self.snapshots.popleft()[1])
+            encounter, second = self.snapshots[0]
+            self.snapshots[0] = (encounter, compress(decompress(second, oldest)))
+
+        elapsed = (perf_counter() - start) * 1000
+        self.captures += 1
+        self.capture_time += elapsed
+        self.max_capture_time = max(self.max_capture_time, elapsed)
+        # a running average, a single slow snapshot (a garbage collection, the save thread) doesn't count much
+        self.recent_time = self.recent_time * 0.95 + elapsed * 0.05 if self.recent_time else elapsed
+        self.interval = REWIND_INTERVAL * max(1, self.recent_time / REWIND_CAPTURE_BUDGET)
+
+    def clear(self):
+        self.snapshots.clear()
+        self.last = None
+
+    def get_data(self, index):
+        # every snapshot up to the index is decompressed, each one is the base of the next
+        data = None
+        for i, (_, compressed) in enumerate(self.snapshots):
+            data = decompress(compressed, data)
+            if i == index:
+                break
+        return data
+
+    def get_state(self, index):
+        return decode_snapshot(self.get_data(index % len(self.snapshots)))
+
+    def get_last_encounter(self):
+        for index in range(len(self.snapshots) - 1, -1, -1):
+            if self.snapshots[index][0]:
+                return index
+        return None
+
+    def rewind(self, game, index):
+        # the game goes on from the snapshot, the ones taken after it are dropped
+        index %= len(self.snapshots)
+        self.last = self.get_data(index)
+        while len(self.snapshots) > index + 1:
+            self.snapshots.pop()
+        self.restore(game, decode_snapshot(self.last))
+
+    def restore(self, game, state):
+        game.play_time = state['play_time']
+        if game.current_world != state['current_world']:
+            game.setup(game.tmx_maps[state['current_world']], state['player']['pos'])
+            game.current_world = state['current_world']
+        game.player.from_dict({**game.player.to_dict(), **state['player']})
+        for character_state, character in zip(state['characters'], game.character_sprites):
+            character.from_dict({**character.to_dict(), **character_state})
+            character.character_data['defeated'] = character_state['defeated']
+
+        # monsters that are still in the party are kept, the inventory keeps showing the same dict
+        monsters = {}
+        for index, monster_state in state['player_monsters'].items():
+            monster = game.player_monsters.get(index)
+            if not monster or monster.name != monster_state['name']:
+                monster = Monster(monster_state['name'], monster_state['level'])
+            monster.from_dict({**monster.to_dict(), **monster_state})
+            monsters[index] = monster
+        game.player_monsters.clear()
+        game.player_monsters.update(monsters)
+
+    def get_stats(self):
+        return {'snapshots': len(self.snapshots), 'bytes': sum(len(data) for _, data in self.snapshots),
+                'captures': self.captures, 'average capture ms': self.capture_time / max(1, self.captures),
+                'max capture ms': self.max_capture_time}
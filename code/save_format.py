@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import lzma
+import zlib
+import struct
+
+from settings import *
+
+SAVE_MAGIC = b'RPGSAVE'
+SAVE_VERSION = 1
+SAVE_EXTENSION = '.sav'
+INDEX_MAGIC = b'RPGSLOTS'
+INDEX_VERSION = 1
+INDEX_FILE = 'slots.idx'
+COMPRESSION_TYPES = {'none': 0, 'zlib': 1, 'lzma': 2}
+COMPRESSORS = {0: bytes, 1: zlib.compress, 2: lzma.compress}
+DECOMPRESSORS = {0: bytes, 1: zlib.decompress, 2: lzma.decompress}
+
+# what a save keeps of the to_dict of each object, the rest comes from game_data and the map again
+# (the abilities of a monster only depend on its name, so they are taken from game_data on load)
+PLAYER_FIELDS = ('pos', 'facing_direction', 'noticed')
+MONSTER_FIELDS = ('name', 'level', 'health', 'energy', 'exp')
+CHARACTER_FIELDS = ('pos', 'facing_direction', 'has_moved', 'can_rotate', 'has_noticed')
+
+
+def get_save_state(data):
+    # the parts of a full save dict (Game.save_game or a json save of an older version) that change while playing
+    # trainers keep their dialogue and monsters in game_data, only who has been defeated is stored
+    game_state = data['game_data']
+    return {
+        'current_world': game_state['current_world'],
+        'play_time': game_state.get('play_time', 0),
+        'player': {field: data['player'][field] for field in PLAYER_FIELDS},
+        # json saves of older versions have no energy, the monster starts with its full energy then
+        'player_monsters': [{field: monster[field] for field in MONSTER_FIELDS if field in monster}
+                            for monster in game_state['player_monsters']],
+        'defeated': [name for name, character in data['character_data']['character_data'].items()
+                     if character['defeated']],
+        'characters': [{field: character[field] for field in CHARACTER_FIELDS} for character in data['characters']]
+    }
+
+
+class SaveWriter:
+    def __init__(self):
+        self.body = bytearray()
+
+    def pack(self, format, *values):
+        self.body += struct.pack(format, *values)
+
+    def string(self, text):
+        self.blob(text.encode(), '<H')
+
+    def blob(self, data, format='<I'):
+        self.pack(format, len(data))
+        self.body += data
+
+    def write(self, state, compression):
+        self.string(state['current_world'])
+        self.pack('<d', state['play_time'])
+
+        player = state['player']
+        self.pack('<dd?', *player['pos'], player['noticed'])
+        self.string(player['facing_direction'])
+
+        self.pack('<H', len(state['player_monsters']))
+        for monster in state['player_monsters']:
+            self.string(monster['name'])
+            self.pack('<Hddd', monster['level'], monster['health'], monster.get('energy', -1), monster['exp'])
+
+        self.pack('<H', len(state['defeated']))
+        for name in state['defeated']:
+            self.string(name)
+
+        # in the order of the characters on the current map
+        self.pack('<H', len(state['characters']))
+        for character in state['characters']:
+            self.pack('<dd???', *character['pos'], character['has_moved'], character['can_rotate'],
+                      character['has_noticed'])
+            self.string(character['facing_direction'])
+
+        compression_type = COMPRESSION_TYPES[compression]
+        return SAVE_MAGIC + struct.pack('<BB', SAVE_VERSION, compression_type) + \
+            COMPRESSORS[compression_type](bytes(self.body))
+
+
+class SaveReader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, format):
+        values = struct.unpack_from(format, self.data, self.offset)
+        self.offset += struct.calcsize(format)
+        return values
+
+    def string(self):
+        return self.blob('<H').decode()
+
+    def blob(self, format='<I'):
+        length, = self.unpack(format)
+        data = bytes(self.data[self.offset:self.offset + length])
+        self.offset += length
+        return data
+
+    def read(self):
+        if bytes(self.data[:len(SAVE_MAGIC)]) != SAVE_MAGIC:
+            raise ValueError('not a save file')
+        version, compression_type = struct.unpack_from('<BB', self.data, len(SAVE_MAGIC))
+        if version > SAVE_VERSION:
+            raise ValueError(f'save version {version} is newer than this game')
+        if compression_type not in DECOMPRESSORS:
+            raise ValueError(f'unknown compression {compression_type}')
+        self.data = DECOMPRESSORS[compression_type](self.data[len(SAVE_MAGIC) + 2:])
+        self.offset = 0
+
+        state = {'current_world': self.string()}
+        state['play_time'], = self.unpack('<d')
+        *pos, noticed = self.unpack('<dd?')
+        state['player'] = {'pos': tuple(pos), 'noticed': noticed, 'facing_direction': self.string()}
+
+        state['player_monsters'] = []
+        for _ in range(*self.unpack('<H')):
+            name = self.string()
+            level, health, energy, exp = self.unpack('<Hddd')
+            monster = {'name': name, 'level': level, 'health': health, 'exp': exp}
+            # -1 if the energy was not known when the save was written
+            if energy >= 0:
+                monster['energy'] = energy
+            state['player_monsters'].append(monster)
+
+        state['defeated'] = [self.string() for _ in range(*self.unpack('<H'))]
+
+        state['characters'] = []
+        for _ in range(*self.unpack('<H')):
+            *pos, has_moved, can_rotate, has_noticed = self.unpack('<dd???')
+            state['characters'].append({'pos': tuple(pos), 'has_moved': has_moved, 'can_rotate': can_rotate,
+                                        'has_noticed': has_noticed, 'facing_direction': self.string()})
+        return state
+
+
+def get_slot_info(state, timestamp):
+    # what the load and save menus show of a slot
+    return {
+        'world': state['current_world'],
+        'party': [(monster['name'], monster['level']) for monster in state['player_monsters']],
+        'play_time': state['play_time'],
+        'timestamp': timestamp,
+        'thumbnail': None  # (size, zlib compressed rgb pixels)
+    }
+
+
+def encode_index(slots):
+    writer = SaveWriter()
+    writer.pack('<H', len(slots))
+    for file_name, slot in slots.items():
+        writer.string(file_name)
+        writer.string(slot['world'])
+        writer.pack('<ddB', slot['play_time'], slot['timestamp'], len(slot['party']))
+        for name, level in slot['party']:
+            writer.string(name)
+            writer.pack('<H', level)
+        size, pixels = slot['thumbnail'] or ((0, 0), b'')
+        writer.pack('<HH', *size)
+        writer.blob(pixels)
+    return INDEX_MAGIC + struct.pack('<B', INDEX_VERSION) + bytes(writer.body)
+
+
+def decode_index(data):
+    if data[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+        raise ValueError('not a slot index')
+    version, = struct.unpack_from('<B', data, len(INDEX_MAGIC))
+    if version > INDEX_VERSION:
+        raise ValueError(f'slot index version {version} is newer than this game')
+    reader = SaveReader(data)
+    reader.offset = len(INDEX_MAGIC) + 1
+    slots = {}
+    for _ in range(*reader.unpack('<H')):
+        file_name = reader.string()
+        slot = {'world': reader.string()}
+        slot['play_time'], slot['timestamp'], party_size = reader.unpack('<ddB')
+        slot['party'] = [(reader.string(), *reader.unpack('<H')) for _ in range(party_size)]
+        size = reader.unpack('<HH')
+        pixels = reader.blob()
+        slot['thumbnail'] = (size, pixels) if pixels else None
+        slots[file_name] = slot
+    return slots
+
+
+def encode_save(state, compression=SAVE_COMPRESSION):
+    return SaveWriter().write(state, compression)
+
+
+def decode_save(data):
+    # save files of this format, json saves of older versions (plain or zlib compressed) are converted
+    if data[:len(SAVE_MAGIC)] == SAVE_MAGIC:
+        return SaveReader(data).read()
+    if data[:1] != b'{':
+        data = zlib.decompress(data)
+    return get_save_state(json.loads(data))
+
+
+def convert_save(path, compression=SAVE_COMPRESSION):
+    # writes the .sav next to an old json save, the json file is kept
+    with open(path, 'rb') as file:
+        state = decode_save(file.read())
+    new_path = os.path.splitext(path)[0] + SAVE_EXTENSION
+    with open(new_path + '.tmp', 'wb') as file:
+        file.write(encode_save(state, compression))
+    os.replace(new_path + '.tmp', new_path)
+    return new_path
+
+
+if __name__ == '__main__':
+    # python save_format.py [save files], every json save in save_data/saves without arguments
+    folder = os.path.join('..', 'save_data', 'saves')
+    paths = sys.argv[1:] or [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                             if name.endswith('.json')]
+    for path in paths:
+        new_path = convert_save(path)
+        print(f'{path} ({os.path.getsize(path)} bytes) -> {new_path} ({os.path.getsize(new_path)} bytes)')
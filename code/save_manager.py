@@ -1,15 +1,64 @@
 import os
-import json
+import time
+import lzma
+import zlib
+import struct
+import threading
 from settings import *
+from save_format import SAVE_EXTENSION, INDEX_FILE, get_save_state, get_slot_info, encode_save, decode_save, \
+    encode_index, decode_index
 from debug import debug
+from concurrent.futures import ThreadPoolExecutor
+
+DECODE_ERRORS = (ValueError, KeyError, struct.error, zlib.error, lzma.LZMAError)
+ENCODE_ERRORS = (ValueError, KeyError, TypeError, struct.error)
+
+
+def write_file(path, data):
+    # a crash while writing leaves the old file in place, the new one is on the disk before it replaces it
+    try:
+        with open(path + '.tmp', 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+    except OSError:
+        try:
+            os.remove(path + '.tmp')
+        except OSError:
+            pass
+        raise
+
+
+def get_slot_file(path):
+    # the slot a save file belongs to, json saves of older versions count as their .sav slot
+    name, extension = os.path.splitext(os.path.basename(path))
+    return name + SAVE_EXTENSION if extension in (SAVE_EXTENSION, '.json') else None
 
 
 class SaveManager:
-    def __init__(self, filename=f"savefile{VERSION}.json", filepath='../save_data/saves/'):
+    # the game hands over its state, only the parts that change while playing are copied on the main thread
+    # encoding and writing them happens on a worker thread
+    # the worker also keeps a small index of every slot up to date, so the menus don't have to read the saves
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='saves')
+
+    def __init__(self, filename=f"savefile{VERSION}{SAVE_EXTENSION}", filepath='../save_data/saves/'):
         self.filepath = filepath
         self.filename = filename
+        self.pending = []  # (future, path, callback) of saves that were not reported yet
         self.ensure_directory_exists()
 
+        # slot index, read the first time a menu asks for it
+        self.index_lock = threading.Lock()
+        self.slots = None  # file name -> slot info
+        self.thumbnails = {}  # (file name, width) -> (timestamp, surface), a new save of the slot replaces it
+        self.index_error = None  # debug draws on the screen, so errors of the worker are reported by update
+
+        # stats
+        self.saves = 0
+        self.snapshot_time = 0
+        self.index_reads = 0
+
     def ensure_directory_exists(self):
         if not os.path.exists(self.filepath):
             os.makedirs(self.filepath)
@@ -17,33 +66,155 @@ class SaveManager:
     def get_full_path(self):
         return os.path.join(self.filepath, self.filename)
 
-    def save(self, data, file_name=f"savefile{VERSION}.json"):
+    def save(self, data, file_name=f"savefile{VERSION}{SAVE_EXTENSION}", callback=None, thumbnail=None):
+        # thumbnail is a small surface the menus show for the slot
         self.filename = file_name
         full_path = self.get_full_path()
+        start = time.perf_counter()
+        state = get_save_state(data)
+        if thumbnail:
+            thumbnail = (thumbnail.get_size(), pygame.image.tobytes(thumbnail, 'RGB'))
+        self.snapshot_time += time.perf_counter() - start
+        self.saves += 1
+        future = self.executor.submit(self.write, state, full_path, thumbnail, time.time())
+        self.pending.append((future, full_path, callback))
+
+    def write(self, state, full_path, thumbnail, timestamp):
+        # runs on the save thread, the state is already a copy so the game can keep changing
         try:
-            with open(full_path, 'w') as savefile:
-                json.dump(data, savefile, indent=4)
-            debug(f"Game saved to {full_path}")
-        except IOError as e:
-            debug(f"An error occurred while saving the game: {e}")
+            write_file(full_path, encode_save(state))
+        except (OSError, *ENCODE_ERRORS) as e:
+            # a state that can't be encoded is reported like a failed write, the old save is kept
+            return e
+
+        slot = get_slot_info(state, timestamp)
+        if thumbnail:
+            size, pixels = thumbnail
+            slot['thumbnail'] = (size, zlib.compress(pixels))
+        with self.index_lock:
+            self.read_index()
+            # a new dict, the menus may be reading the old one on the main thread
+            self.slots = {**self.slots, get_slot_file(full_path): slot}
+            self.write_index()
+        return None
+
+    def read_index(self):
+        # called with the index lock held
+        if self.slots is not None:
+            return
+        self.index_reads += 1
+        self.slots = {}
+        index_path = os.path.join(self.filepath, INDEX_FILE)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'rb') as file:
+                    self.slots = decode_index(file.read())
+            except (OSError, *DECODE_ERRORS) as e:
+                self.index_error = f"Could not read the slot index {index_path}: {e}"
 
-    def load(self, file_name=f"savefile{VERSION}.json"):
+        # slots whose save was deleted are dropped, saves from before the index get their slot filled in once
+        # from the save itself, .sav files first
+        file_names = sorted(os.listdir(self.filepath), key=lambda name: not name.endswith(SAVE_EXTENSION))
+        slot_files = {get_slot_file(file_name) for file_name in file_names}
+        changed = any(slot_file not in slot_files for slot_file in self.slots)
+        self.slots = {slot_file: slot for slot_file, slot in self.slots.items() if slot_file in slot_files}
+        missing = {}
+        for file_name in file_names:
+            slot_file = get_slot_file(file_name)
+            if slot_file and slot_file not in self.slots and slot_file not in missing:
+                path = os.path.join(self.filepath, file_name)
+                try:
+                    with open(path, 'rb') as file:
+                        missing[slot_file] = get_slot_info(decode_save(file.read()), os.path.getmtime(path))
+                except (OSError, *DECODE_ERRORS):
+                    pass
+        if missing or changed:
+            self.slots = {**self.slots, **missing}
+            self.executor.submit(self.update_index)
+
+    def update_index(self):
+        with self.index_lock:
+            self.write_index()
+
+    def write_index(self):
+        index_path = os.path.join(self.filepath, INDEX_FILE)
+        try:
+            write_file(index_path, encode_index(self.slots))
+        except OSError as e:
+            self.index_error = f"Could not write the slot index {index_path}: {e}"
+
+    def get_slots(self):
+        if self.slots is None:
+            with self.index_lock:
+                self.read_index()
+            self.report_index_error()
+        return self.slots
+
+    def get_thumbnail(self, file_name, width=None):
+        # scaled to the width if one is given, the menus ask for the same slot every frame
+        slot = self.get_slots().get(file_name)
+        if not slot or not slot['thumbnail']:
+            return None
+        key = (file_name, width)
+        if key not in self.thumbnails or self.thumbnails[key][0] != slot['timestamp']:
+            size, pixels = slot['thumbnail']
+            surf = pygame.image.frombytes(zlib.decompress(pixels), size, 'RGB')
+            if width:
+                surf = pygame.transform.scale(surf, (width, width * surf.get_height() / surf.get_width()))
+            self.thumbnails[key] = (slot['timestamp'], surf)
+        return self.thumbnails[key][1]
+
+    def report_index_error(self):
+        if self.index_error:
+            debug(self.index_error)
+            self.index_error = None
+
+    def update(self):
+        # finished saves are reported on the main thread, so the callbacks can touch the game
+        for entry in self.pending[:]:
+            future, full_path, callback = entry
+            if future.done():
+                self.pending.remove(entry)
+                error = future.result()
+                if error:
+                    debug(f"An error occurred while saving the game: {error}")
+                else:
+                    debug(f"Game saved to {full_path}")
+                if callback:
+                    callback(error is None)
+        self.report_index_error()
+
+    def is_saving(self):
+        return bool(self.pending)
+
+    def wait(self):
+        for future, *_ in self.pending:
+            future.result()
+        self.update()
+
+    def load(self, file_name=f"savefile{VERSION}{SAVE_EXTENSION}"):
+        # a save that is still being written is finished first
+        self.wait()
         self.filename = file_name
         full_path = self.get_full_path()
         if not os.path.exists(full_path):
-            debug(f"No save file found: {full_path}")
-            return None
+            # slots saved by older versions of the game
+            legacy_path = os.path.splitext(full_path)[0] + '.json'
+            if not os.path.exists(legacy_path):
+                debug(f"No save file found: {full_path}")
+                return None
+            full_path = legacy_path
 
         try:
-            with open(full_path, 'r') as savefile:
-                data = json.load(savefile)
-                debug(f"Game loaded from {full_path}")
-                return data
+            with open(full_path, 'rb') as savefile:
+                state = decode_save(savefile.read())
+            debug(f"Game loaded from {full_path}")
+            return state
         except IOError as e:
             debug(f"An error occurred while loading the game: {e}")
             return None
-        except json.JSONDecodeError as e:
-            debug(f"Error decoding JSON data from the save file: {e}")
+        except DECODE_ERRORS as e:
+            debug(f"Error decoding the save file: {e}")
             return None
 
 
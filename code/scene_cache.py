@@ -0,0 +1,74 @@
+from settings import *
+from groups import AllSprites
+from collections import OrderedDict
+
+
+class Scene:
+    # the sprite groups of one map, the game swaps them in as a whole
+    def __init__(self, name):
+        self.name = name
+        self.collision_sprites = pygame.sprite.Group()
+        self.all_sprites = AllSprites(self.collision_sprites)
+        self.character_sprites = pygame.sprite.Group()
+        self.transition_sprites = pygame.sprite.Group()
+        self.encounter_sprites = pygame.sprite.Group()
+
+    def add_layout(self, layout):
+        # one sprite at a time, so a large map can be spread over several frames
+        for sprites, group in ((layout.all_sprites, self.all_sprites),
+                               (layout.collision_sprites, self.collision_sprites),
+                               (layout.encounter_sprites, self.encounter_sprites),
+                               (layout.transition_sprites, self.transition_sprites)):
+            for sprite in sprites:
+                group.add(sprite)
+                yield
+
+
+class SceneCache:
+    # fully built maps the player left, the least recently visited ones are dropped once there are too many
+    # the characters keep their state, so coming back to a map looks as if it never went away
+    def __init__(self, size=SCENE_CACHE_SIZE):
+        self.size = size
+        self.scenes = OrderedDict()  # map name -> scene, least recently visited first
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def add(self, scene):
+        self.scenes.pop(scene.name, None)
+        self.scenes[scene.name] = scene
+        self.evict()
+
+    def pop(self, name):
+        # the active scene lives outside of the cache until it is left again
+        scene = self.scenes.pop(name, None)
+        if scene is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return scene
+
+    def evict(self):
+        while len(self.scenes) > self.size:
+            self.scenes.popitem(last=False)
+            self.evictions += 1
+
+    def set_size(self, size):
+        self.size = size
+        self.evict()
+
+    def __contains__(self, name):
+        return name in self.scenes
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'scenes': list(self.scenes)
+        }
+
+    def clear(self):
+        self.scenes.clear()
@@ -3,9 +3,28 @@ from pygame.math import Vector2 as vector
 from sys import exit
 
 VERSION = '0.6'
+DEFAULT_SCREEN_SIZE = (1280, 720)  # used when there is no display to read the size from
 TILE_SIZE = 64
 ANIMATION_SPEED = 6
 BATTLE_OUTLINE_WIDTH = 4
+TEXT_CACHE_SIZE = 4 * 1024 * 1024  # bytes of rendered text kept by the text renderer
+ASSET_CACHE_BUDGET = 64 * 1024 * 1024  # bytes of scaled, flipped, outline and silhouette frames and map tiles
+ASSET_LOADER_WORKERS = 4  # decode threads used while loading the game assets
+LAZY_ASSETS = ('characters', 'monsters', 'flipped', 'attacks', 'backgrounds')  # loaded on first use
+PREWARM_DISTANCE = TILE_SIZE * 8  # encounter patches and trainers this close get their assets prewarmed
+ASSET_PACK_PATH = '../data/assets.pack'  # written by bake.py, the game falls back to the source files without it
+SCENE_CACHE_SIZE = 3  # maps left by the player that are kept fully built
+SETUP_FRAME_BUDGET = 8  # milliseconds of map building per frame during a transition
+SFX_CHANNELS = {'battle': 4, 'world': 2}  # mixer channels reserved for each category of sound effects
+SFX_CATEGORIES = {'sfx_notice': 'world'}  # every other sound effect is a battle sound
+SAVE_COMPRESSION = 'zlib'  # compression of the save files, 'none', 'zlib' or 'lzma'
+THUMBNAIL_SIZE = (160, 90)  # size of the screenshot the load and save menus show for a slot
+JOURNAL_FLUSH_INTERVAL = 2000  # milliseconds between writes of the autosave journal
+JOURNAL_COMPACT_RECORDS = 64  # journal records after which the autosave is written as a new snapshot
+SETTINGS_SAVE_DELAY = 500  # milliseconds without a new change before the settings are written
+REWIND_INTERVAL = 1000  # milliseconds between two rewind snapshots
+REWIND_SNAPSHOTS = 120  # rewind snapshots kept, the oldest one is dropped for a new one
+REWIND_CAPTURE_BUDGET = 0.5  # milliseconds a rewind snapshot may take, slower ones space out the next ones
 
 COLORS = {
     'white': '#f4fefa',
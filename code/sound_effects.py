@@ -0,0 +1,101 @@
+import os
+
+from settings import *
+from support import hash_file
+from os.path import join, exists, basename
+from debug import record_error
+
+SOUND_CACHE_PATH = join('..', 'save_data', 'cache', 'sounds')
+
+
+def load_sound(path):
+    # the decoded samples are kept on disk by the hash of the source, so mp3 and adpcm files are only decoded once
+    # they depend on the mixer format as well, a different output format decodes them again
+    frequency, size, channels = pygame.mixer.get_init()
+    file_path = join(SOUND_CACHE_PATH,
+                     f'{basename(path).split(".")[0]}_{hash_file(path)}_{frequency}_{size}_{channels}.pcm')
+    if exists(file_path):
+        try:
+            with open(file_path, 'rb') as file:
+                return pygame.mixer.Sound(buffer=file.read())
+        except (OSError, pygame.error) as e:
+            record_error(f"Could not read sound cache {file_path}: {e}")
+
+    sound = pygame.mixer.Sound(path)
+    try:
+        os.makedirs(SOUND_CACHE_PATH, exist_ok=True)
+        with open(file_path + '.tmp', 'wb') as file:
+            file.write(sound.get_raw())
+        os.replace(file_path + '.tmp', file_path)
+    except OSError as e:
+        record_error(f"Could not write sound cache {file_path}: {e}")
+    return sound
+
+
+class ChannelPool:
+    # channels only one category of sounds plays on, when all of them are busy the oldest sound is cut off
+    def __init__(self, channels):
+        self.channels = channels
+        self.started = [0] * len(channels)
+
+        # stats
+        self.plays = 0
+        self.steals = 0
+
+    def play(self, sound):
+        now = pygame.time.get_ticks()
+        oldest = 0
+        for index in range(len(self.channels)):
+            if not self.channels[index].get_busy():
+                oldest = index
+                break
+            if self.started[index] < self.started[oldest]:
+                oldest = index
+        else:
+            self.steals += 1
+        self.channels[oldest].play(sound)
+        self.started[oldest] = now
+        self.plays += 1
+
+
+class SoundHandle:
+    # a sound together with the channels it plays on, resolved once when the game starts
+    def __init__(self, sound, pool):
+        self.sound = sound
+        self.pool = pool
+
+    def play(self):
+        self.pool.play(self.sound)
+
+    def set_volume(self, volume):
+        self.sound.set_volume(volume)
+
+    def fadeout(self, time):
+        self.sound.fadeout(time)
+
+
+class SoundEffects:
+    # every category gets its own reserved channels, so a burst of attack sounds can't drop a notice sound
+    def __init__(self, channels=SFX_CHANNELS):
+        total = sum(channels.values())
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), total))
+        pygame.mixer.set_reserved(total)
+
+        self.pools = {}
+        first = 0
+        for category, count in channels.items():
+            self.pools[category] = ChannelPool([pygame.mixer.Channel(index) for index in range(first, first + count)])
+            first += count
+
+    def get_handles(self, sounds):
+        return {name: SoundHandle(sound, self.pools[SFX_CATEGORIES.get(name, 'battle')])
+                for name, sound in sounds.items()}
+
+    @staticmethod
+    def resolve_attacks(attack_data, handles):
+        # battles play attack['sound'] instead of building the sound name for every attack
+        for attack in attack_data.values():
+            attack['sound'] = handles['sfx_' + attack['animation']]
+
+    def get_stats(self):
+        return {category: {'plays': pool.plays, 'steals': pool.steals} for category, pool in self.pools.items()}
@@ -1,10 +1,10 @@
 import pygame.sprite
 
 from settings import *
-from config_manager import config_manager
 from random import uniform
 from support import draw_bar
 from timer import Timer
+from text_renderer import text_renderer
 
 
 # overworld sprites
@@ -66,13 +66,15 @@ class AnimatedSprite(Sprite):
 
 # battle sprites
 class MonsterSprite(pygame.sprite.Sprite):
-    def __init__(self, pos, frames, groups, monster, index, pos_index, entity, apply_attack, create_monster):
+    def __init__(self, pos, frames, silhouette_frames, groups, monster, index, pos_index, entity, apply_attack,
+                 create_monster):
         # data
         self.index = index
         self.pos_index = pos_index
         self.entity = entity
         self.monster = monster
         self.frame_index, self.frames, self.state = 0, frames, 'idle'
+        self.silhouette_frames = silhouette_frames
         self.animation_speed = ANIMATION_SPEED + uniform(-1, 1)
         self.z = BATTLE_LAYERS['monster']
         self.hightlight = False
@@ -83,16 +85,8 @@ class MonsterSprite(pygame.sprite.Sprite):
         self.create_monster = create_monster
         self.alive = True
 
-        # sprite setup
+        # sprite setup (frames come scaled from the frame cache)
         super().__init__(groups)
-        for state, surface_list in self.frames.items():
-            new_surf_list = []
-            width = config_manager.settings['video']['window_width'] // 10
-            height = width
-            for surf in surface_list:
-                scaled_surf = pygame.transform.scale(surf, (width, height))
-                new_surf_list.append(scaled_surf)
-            self.frames[state] = new_surf_list
         self.image = self.frames[self.state][self.frame_index]
         self.rect = self.image.get_frect(center=pos)
 
@@ -105,9 +99,7 @@ class MonsterSprite(pygame.sprite.Sprite):
             self.state = 'idle'
         self.frame_index %= len(self.frames[self.state])
         if self.hightlight:
-            white_surf = pygame.mask.from_surface(self.image).to_surface()
-            white_surf.set_alpha(0)
-            self.image = white_surf
+            self.image = self.silhouette_frames[self.state][int(self.frame_index)]
         else:
             self.image = self.frames[self.state][int(self.frame_index)]
 
@@ -141,15 +133,6 @@ class MonsterOutlineSprite(pygame.sprite.Sprite):
         self.z = BATTLE_LAYERS['outline']
         self.monster_sprite = monster_sprite
         self.frames = frames
-        for state, surface_list in self.frames.items():
-            new_surf_list = []
-            width = config_manager.settings['video']['window_width'] // 10
-            height = width
-            for surf in surface_list:
-                scaled_surf = pygame.transform.scale(surf, (width, height))
-                new_surf_list.append(scaled_surf)
-            self.frames[state] = new_surf_list
-
         self.image = self.frames[self.monster_sprite.state][self.monster_sprite.frame_index]
         self.rect = self.image.get_frect(center=self.monster_sprite.rect.center)
 
@@ -166,7 +149,7 @@ class MonsterNameSprite(pygame.sprite.Sprite):
         self.monster_sprite = monster_sprite
         self.z = BATTLE_LAYERS['name']
 
-        text_surf = font.render(monster_sprite.monster.name, False, COLORS['black'])
+        text_surf = text_renderer.render(font, monster_sprite.monster.name, False, COLORS['black'])
         padding = 5
 
         self.image = pygame.Surface((text_surf.get_width() + padding * 2, text_surf.get_height() + padding * 2),
@@ -183,7 +166,7 @@ class MonsterLevelSprite(pygame.sprite.Sprite):
     def __init__(self, entity, anchor, monster_sprite, groups, font):
         super().__init__(groups)
         self.monster_sprite = monster_sprite
-        self.font = font
+        self.atlas = text_renderer.get_atlas(font, False, COLORS['black'])
         self.z = BATTLE_LAYERS['name']
 
         self.image = pygame.Surface((60, 26), pygame.SRCALPHA)
@@ -194,9 +177,8 @@ class MonsterLevelSprite(pygame.sprite.Sprite):
     def update(self, _):
         self.image.fill(pygame.Color(0, 0, 0, 0))
 
-        text_surf = self.font.render(f'lvl: {self.monster_sprite.monster.level}', False, COLORS['black'])
-        text_rect = text_surf.get_frect(center=(self.rect.width / 2, self.rect.height / 2))
-        self.image.blit(text_surf, text_rect)
+        self.atlas.draw(self.image, f'lvl: {self.monster_sprite.monster.level}',
+                        center=(self.rect.width / 2, self.rect.height / 2))
 
         draw_bar(
             surf=self.image,
@@ -216,7 +198,7 @@ class MonsterStatsSprite(pygame.sprite.Sprite):
     def __init__(self, pos, monster_sprite, size, groups, font):
         super().__init__(groups)
         self.monster_sprite = monster_sprite
-        self.font = font
+        self.atlas = text_renderer.get_atlas(font, False, COLORS['black'])
         self.z = BATTLE_LAYERS['overlay']
 
         self.image = pygame.Surface(size, pygame.SRCALPHA)
@@ -228,11 +210,10 @@ class MonsterStatsSprite(pygame.sprite.Sprite):
         for index, (value, max_value) in enumerate(self.monster_sprite.monster.get_info()):
             color = (COLORS['red'], COLORS['blue'], COLORS['gray'])[index]
             if index < 2:
-                text_surf = self.font.render(f'{int(value)}/{max_value}', False, COLORS['black'])
-                text_rect = text_surf.get_frect(topleft=(self.rect.width * 0.05, index * self.rect.height / 2))
+                text_rect = self.atlas.draw(self.image, f'{int(value)}/{max_value}',
+                                            topleft=(self.rect.width * 0.05, index * self.rect.height / 2))
                 bar_rect = pygame.FRect(text_rect.bottomleft + vector(0, -self.rect.height * 0.05),
                                         (self.rect.width * 0.9, 4))
-                self.image.blit(text_surf, text_rect)
                 draw_bar(
                     surf=self.image,
                     rect=bar_rect,
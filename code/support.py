@@ -1,26 +1,44 @@
+import numpy
 import pygame
+import hashlib
 
 from settings import *
 from config_manager import config_manager
 from os.path import join
 from os import walk
+from functools import cache
+from asset_pack import asset_pack
 from pytmx.util_pygame import load_pygame
 
 
 # import functions
+@cache
+def get_alpha_masks():
+    return pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha().get_masks()
+
+
+def convert_image(surf, alpha=True):
+    # surfaces already in the display format are kept, baked ones keep pointing into the mapped pack
+    if alpha and surf.get_flags() & pygame.SRCALPHA and surf.get_masks() == get_alpha_masks():
+        return surf
+    return surf.convert_alpha() if alpha else surf.convert()
+
+
+def load_image(full_path, alpha=True):
+    surf = asset_pack.get_image(full_path) if asset_pack else None
+    return convert_image(surf if surf is not None else pygame.image.load(full_path), alpha)
+
+
 def import_image(*path, alpha=True, file_format='png'):
     full_path = join(*path) + f'.{file_format}'
-    surf = pygame.image.load(full_path).convert_alpha() if alpha else pygame.image.load(full_path).convert()
-    return surf
+    return load_image(full_path, alpha)
 
 
 def import_folder(*path):
     frames = []
     for folder_path, sub_folders, image_names in walk(join(*path)):
         for image_name in sorted(image_names, key=lambda name: int(name.split('.')[0])):
-            full_path = join(folder_path, image_name)
-            surf = pygame.image.load(full_path).convert_alpha()
-            frames.append(surf)
+            frames.append(load_image(join(folder_path, image_name)))
     return frames
 
 
@@ -28,9 +46,7 @@ def import_folder_dict(*path):
     frames = {}
     for folder_path, sub_folders, image_names in walk(join(*path)):
         for image_name in image_names:
-            full_path = join(folder_path, image_name)
-            surf = pygame.image.load(full_path).convert_alpha()
-            frames[image_name.split('.')[0]] = surf
+            frames[image_name.split('.')[0]] = load_image(join(folder_path, image_name))
     return frames
 
 
@@ -43,53 +59,25 @@ def import_sub_folders(*path):
     return frames
 
 
-def import_tilemap(cols, rows, *path):
-    frames = {}
-    surf = import_image(*path)
-    cell_width, cell_height = surf.get_width() / cols, surf.get_height() / rows
-    for col in range(cols):
-        for row in range(rows):
-            cutout_rect = pygame.Rect(col * cell_width, row * cell_height, cell_width, cell_height)
-            cutout_surf = pygame.Surface((cell_width, cell_height))
-            cutout_surf.fill('green')
-            cutout_surf.set_colorkey('green')
-            cutout_surf.blit(surf, (0, 0), cutout_rect)
-            frames[(col, row)] = cutout_surf
-    return frames
+def import_tilemap(cols, rows, *path, subsurface=True):
+    return slice_tilemap(import_image(*path), cols, rows, subsurface)
 
 
-def import_single_character(cols, rows, *path):
-    frame_dict = import_tilemap(cols, rows, *path)
-    new_dict = {}
-    for row, direction in enumerate(('down', 'left', 'right', 'up')):
-        new_dict[direction] = [frame_dict[(col, row)] for col in range(cols)]
-        new_dict[f'{direction}_idle'] = [frame_dict[(0, row)]]
-    return new_dict
+def import_single_character(cols, rows, *path, subsurface=True):
+    return slice_character(import_image(*path), cols, rows, subsurface)
 
 
-def import_all_characters(*path):
+def import_all_characters(*path, subsurface=True):
     new_dict = {}
     for _, __, image_names in walk(join(*path)):
         for image in image_names:
             image_name = image.split('.')[0]
-            new_dict[image_name] = import_single_character(4, 4, *path, image_name)
+            new_dict[image_name] = import_single_character(4, 4, *path, image_name, subsurface=subsurface)
     return new_dict
 
 
-def import_coastline(cols, rows, *path):
-    frame_dictionary = import_tilemap(cols, rows, *path)
-    new_dict = {}
-    terrains = ['grass', 'grass_i', 'sand_i', 'sand', 'rock', 'rock_i', 'ice', 'ice_i']
-    sides = {
-        'topleft': (0, 0), 'top': (1, 0), 'topright': (2, 0),
-        'bottomleft': (0, 2), 'bottom': (1, 2), 'bottomright': (2, 2),
-        'left': (0, 1), 'right': (2, 1)
-    }
-    for index, terrain in enumerate(terrains):
-        new_dict[terrain] = {}
-        for key, pos in sides.items():
-            new_dict[terrain][key] = [frame_dictionary[pos[0] + index * 3, pos[1] + row] for row in range(0, rows, 3)]
-    return new_dict
+def import_coastline(cols, rows, *path, subsurface=True):
+    return slice_coastline(import_image(*path), cols, rows, subsurface)
 
 
 def import_tmx_maps(*path):
@@ -100,24 +88,21 @@ def import_tmx_maps(*path):
     return tmx_dict
 
 
-def import_monster(cols, rows, *path):
+def import_monster(cols, rows, *path, subsurface=True):
     monster_dict = {}
     for folder_path, sub_folders, image_names in walk(join(*path)):
         for image in image_names:
             image_name = image.split('.')[0]
-            monster_dict[image_name] = {}
-            frame_dict = import_tilemap(cols, rows, *path, image_name)
-            for row, key in enumerate(('idle', 'attack')):
-                monster_dict[image_name][key] = [frame_dict[(col, row)] for col in range(cols)]
+            monster_dict[image_name] = slice_monster(import_image(*path, image_name), cols, rows, subsurface)
     return monster_dict
 
 
-def import_attacks(*path):
+def import_attacks(*path, subsurface=True):
     attack_dict = {}
     for folder_path, _, image_names in walk(join(*path)):
         for image in image_names:
             image_name = image.split('.')[0]
-            attack_dict[image_name] = list(import_tilemap(4, 1, folder_path, image_name).values())
+            attack_dict[image_name] = slice_attack(import_image(folder_path, image_name), 4, subsurface)
     return attack_dict
 
 
@@ -130,6 +115,59 @@ def audio_importer(*path):
     return files
 
 
+# slicing functions (the sheet has to be converted already)
+def slice_tilemap(surf, cols, rows, subsurface=True):
+    frames = {}
+    cell_width, cell_height = surf.get_width() / cols, surf.get_height() / rows
+    for col in range(cols):
+        for row in range(rows):
+            cutout_rect = pygame.Rect(col * cell_width, row * cell_height, cell_width, cell_height)
+            if subsurface:
+                # views into the converted sheet, no pixels are copied and alpha stays intact
+                frames[(col, row)] = surf.subsurface(cutout_rect)
+            else:
+                cutout_surf = pygame.Surface((cell_width, cell_height))
+                cutout_surf.fill('green')
+                cutout_surf.set_colorkey('green')
+                cutout_surf.blit(surf, (0, 0), cutout_rect)
+                frames[(col, row)] = cutout_surf
+    return frames
+
+
+def slice_character(surf, cols=4, rows=4, subsurface=True):
+    frame_dict = slice_tilemap(surf, cols, rows, subsurface)
+    new_dict = {}
+    for row, direction in enumerate(('down', 'left', 'right', 'up')):
+        new_dict[direction] = [frame_dict[(col, row)] for col in range(cols)]
+        new_dict[f'{direction}_idle'] = [frame_dict[(0, row)]]
+    return new_dict
+
+
+def slice_coastline(surf, cols=24, rows=12, subsurface=True):
+    frame_dictionary = slice_tilemap(surf, cols, rows, subsurface)
+    new_dict = {}
+    terrains = ['grass', 'grass_i', 'sand_i', 'sand', 'rock', 'rock_i', 'ice', 'ice_i']
+    sides = {
+        'topleft': (0, 0), 'top': (1, 0), 'topright': (2, 0),
+        'bottomleft': (0, 2), 'bottom': (1, 2), 'bottomright': (2, 2),
+        'left': (0, 1), 'right': (2, 1)
+    }
+    for index, terrain in enumerate(terrains):
+        new_dict[terrain] = {}
+        for key, pos in sides.items():
+            new_dict[terrain][key] = [frame_dictionary[pos[0] + index * 3, pos[1] + row] for row in range(0, rows, 3)]
+    return new_dict
+
+
+def slice_monster(surf, cols=4, rows=2, subsurface=True):
+    frame_dict = slice_tilemap(surf, cols, rows, subsurface)
+    return {key: [frame_dict[(col, row)] for col in range(cols)] for row, key in enumerate(('idle', 'attack'))}
+
+
+def slice_attack(surf, cols=4, subsurface=True):
+    return list(slice_tilemap(surf, cols, 1, subsurface).values())
+
+
 # game functions
 def check_connection(radius, entity, target, tolerance=5):
     relation = vector(target.rect.center) - vector(entity.rect.center)
@@ -150,28 +188,40 @@ def draw_bar(surf, rect, value, max_value, color, bg_color, radius=1):
     pygame.draw.rect(surf, color, progress_rect, 0, radius)
 
 
-def outline_creator(frame_dict, width):
-    outline_frame_dict = {}
-    for monster, monster_frames in frame_dict.items():
-        outline_frame_dict[monster] = {}
-        for state, frames in monster_frames.items():
-            outline_frame_dict[monster][state] = []
-            for frame in frames:
-                new_surf = pygame.Surface(vector(frame.get_size()) + vector(width * 2), pygame.SRCALPHA)
-                new_surf.fill((0, 0, 0, 0))
-                white_frame = pygame.mask.from_surface(frame).to_surface()
-                white_frame.set_colorkey('black')
-
-                new_surf.blit(white_frame, (0, 0))  # topleft
-                new_surf.blit(white_frame, (width, 0))  # top
-                new_surf.blit(white_frame, (width*2, 0))  # topright
-                new_surf.blit(white_frame, (width*2, width))  # right
-                new_surf.blit(white_frame, (width*2, width*2))  # bottomright
-                new_surf.blit(white_frame, (width, width*2))  # bottom
-                new_surf.blit(white_frame, (0, width*2))  # bottomleft
-                new_surf.blit(white_frame, (0, width))  # left
-                outline_frame_dict[monster][state].append(new_surf)
-    return outline_frame_dict
+def hash_file(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def create_outline_alpha(frame, width):
+    # dilate the opaque pixels by shifting them into the eight directions
+    opaque = get_opaque_pixels(frame)
+    frame_width, frame_height = opaque.shape
+    outline = numpy.zeros((frame_width + width * 2, frame_height + width * 2), dtype=bool)
+    for x, y in ((0, 0), (width, 0), (width * 2, 0), (width * 2, width), (width * 2, width * 2),
+                 (width, width * 2), (0, width * 2), (0, width)):
+        outline[x:x + frame_width, y:y + frame_height] |= opaque
+    return outline.astype(numpy.uint8) * 255
+
+
+def alpha_to_surface(alpha, color=COLORS['pure white']):
+    surf = pygame.Surface(alpha.shape, pygame.SRCALPHA)
+    surf.fill(color)
+    pygame.surfarray.pixels_alpha(surf)[:] = alpha
+    return surf
+
+
+def get_opaque_pixels(frame):
+    # same rule as pygame.mask.from_surface: colorkey if set, otherwise alpha above 127
+    if frame.get_flags() & pygame.SRCALPHA:
+        return pygame.surfarray.array_alpha(frame) > 127
+    if frame.get_colorkey() is not None:
+        return pygame.surfarray.array_colorkey(frame) > 0
+    return numpy.ones(frame.get_size(), dtype=bool)
+
+
+def create_silhouette(frame, color=COLORS['pure white']):
+    return alpha_to_surface(get_opaque_pixels(frame).astype(numpy.uint8) * 255, color)
 
 
 # settings functions
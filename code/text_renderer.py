@@ -0,0 +1,136 @@
+import pygame
+
+from os.path import join
+from string import ascii_letters, digits
+from settings import *
+from asset_cache import AssetCache
+
+ATLAS_CHARACTERS = digits + ascii_letters + ' /:.,-+()%'
+
+
+class TextRenderer:
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        # fonts
+        self.fonts = {}
+
+        # glyph atlases for frequently changing text
+        self.atlases = {}
+
+        # rendered text, with its own budget so text does not push out battle frames
+        self.surfaces = AssetCache(max_size)
+
+    def get_font(self, file_name, size):
+        key = (file_name, size)
+        if key not in self.fonts:
+            path = join('..', 'graphics', 'fonts', file_name) if file_name else None
+            self.fonts[key] = pygame.font.Font(path, size)
+        return self.fonts[key]
+
+    def render(self, font, text, antialias, color, shadow=None):
+        # shadow is a (color, offset) pair, e.g. (COLORS['black'], (2, 2))
+        color = color if isinstance(color, (str, tuple)) else tuple(color)
+        key = (font, font.point_size, text, color, antialias, shadow)
+        surf = self.surfaces.get(key)
+        if surf is None:
+            surf = self.surfaces.add(key, self.create_surface(font, text, color, antialias, shadow))
+        return surf
+
+    def get_atlas(self, font, antialias, color):
+        color = color if isinstance(color, (str, tuple)) else tuple(color)
+        key = (font, font.point_size, antialias, color)
+        if key not in self.atlases:
+            self.atlases[key] = GlyphAtlas(font, antialias, color)
+        return self.atlases[key]
+
+    @staticmethod
+    def create_surface(font, text, color, antialias, shadow):
+        text_surf = font.render(text, antialias, color)
+        if not shadow:
+            return text_surf
+
+        # the surface only grows on the side of the shadow, so text placed by its top left stays where it was
+        # the shadow is always antialiased, like the shadows the menus drew themselves
+        shadow_color, (offset_x, offset_y) = shadow
+        shadow_surf = font.render(text, True, shadow_color)
+        text_pos = vector(max(0, -offset_x), max(0, -offset_y))
+        surf = pygame.Surface(vector(text_surf.get_size()) + vector(abs(offset_x), abs(offset_y)), pygame.SRCALPHA)
+        surf.blit(shadow_surf, text_pos + vector(offset_x, offset_y))
+        surf.blit(text_surf, text_pos)
+        return surf
+
+    def get_stats(self):
+        return self.surfaces.get_stats()
+
+    def clear(self):
+        self.surfaces.clear()
+        self.atlases.clear()
+
+
+class GlyphAtlas:
+    def __init__(self, font, antialias, color, characters=ATLAS_CHARACTERS):
+        self.font = font
+        self.antialias = antialias
+        self.color = color
+        self.glyphs = {}
+        self.layouts = {}
+        self.height = font.get_height()
+        self.atlas = None
+        self.build(characters)
+
+    def build(self, characters):
+        # every glyph is rendered once, side by side, into a single surface
+        glyph_surfs = {char: self.font.render(char, self.antialias, self.color) for char in characters}
+        width = sum(surf.get_width() for surf in glyph_surfs.values())
+        self.height = max([self.height] + [surf.get_height() for surf in glyph_surfs.values()])
+        if self.antialias:
+            self.atlas = pygame.Surface((max(1, width), self.height), pygame.SRCALPHA)
+        else:
+            # colorkey blits are cheaper than per pixel alpha for pixel fonts
+            key_color = (255, 0, 255) if pygame.Color(self.color) != pygame.Color(255, 0, 255) else (0, 255, 0)
+            self.atlas = pygame.Surface((max(1, width), self.height))
+            self.atlas.fill(key_color)
+            self.atlas.set_colorkey(key_color)
+
+        self.glyphs = {}
+        self.layouts = {}
+        x = 0
+        for char, surf in glyph_surfs.items():
+            self.atlas.blit(surf, (x, 0))
+            metrics = self.font.metrics(char)[0]
+            advance = metrics[4] if metrics else surf.get_width()
+            self.glyphs[char] = (self.atlas.subsurface((x, 0), surf.get_size()), advance)
+            x += surf.get_width()
+
+    def get_layout(self, text):
+        # glyphs and their x offsets, kept per string since the same values come back often
+        layout = self.layouts.get(text)
+        if layout is None:
+            if not self.glyphs.keys() >= set(text):
+                self.build(''.join(self.glyphs) + ''.join(set(text).difference(self.glyphs)))
+            x, glyphs = 0, []
+            for char in text:
+                glyph, advance = self.glyphs[char]
+                glyphs.append((glyph, x))
+                x += advance
+            if len(self.layouts) >= 1024:
+                self.layouts.clear()
+            layout = self.layouts[text] = (x, glyphs)
+        return layout
+
+    def size(self, text):
+        return self.get_layout(text)[0], self.height
+
+    def draw(self, surf, text, **anchor):
+        # anchor works like get_frect, e.g. draw(surf, '12/20', center=(50, 10))
+        width, glyphs = self.get_layout(text)
+        rect = pygame.FRect(0, 0, width, self.height)
+        for key, value in anchor.items():
+            setattr(rect, key, value)
+
+        x, y = rect.topleft
+        blits = [(glyph, (x + offset, y)) for glyph, offset in glyphs]
+        surf.fblits(blits)
+        return rect
+
+
+text_renderer = TextRenderer()
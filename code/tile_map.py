@@ -0,0 +1,329 @@
+import os
+import re
+import json
+import sys
+import struct
+import hashlib
+import pygame
+import threading
+
+from settings import *
+from array import array
+from os.path import join, exists, dirname, basename, normpath
+from pytmx import TiledMap, TiledTileLayer, TiledObjectGroup, TileFlags
+from pytmx.util_pygame import handle_transformation
+from support import load_image
+from asset_cache import asset_cache
+from debug import record_error
+
+MAP_MAGIC = b'RPGMAP02'
+MAP_CACHE_PATH = join('..', 'save_data', 'cache', 'maps')
+
+# property value types in the binary format, anything else (the frame lists pytmx adds to tile objects) is json
+PROPERTY_TYPES = {bool: 0, int: 1, float: 2, str: 3, type(None): 4}
+PROPERTY_JSON = 5
+
+
+class MapObject:
+    def __init__(self, parent, name, x, y, width, height, gid, properties):
+        self.parent = parent
+        self.name = name
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.gid = gid
+        self.properties = properties
+
+    @property
+    def image(self):
+        return self.parent.get_tile_image(self.gid) if self.gid else None
+
+
+class ObjectLayer(list):
+    def __init__(self, name, objects=()):
+        super().__init__(objects)
+        self.name = name
+
+
+class TileLayer:
+    def __init__(self, parent, name, width, height, data):
+        self.parent = parent
+        self.name = name
+        self.width, self.height = width, height
+        self.data = data  # gids, row by row
+
+    def tiles(self):
+        for index, gid in enumerate(self.data):
+            if gid:
+                image = self.parent.get_tile_image(gid)
+                if image is not None:
+                    yield index % self.width, index // self.width, image
+
+
+class MapData:
+    # the parts of a tmx map the game uses, with tiles as references into the shared tileset images
+    def __init__(self, name, width, height, tiles):
+        self.name = name
+        self.width, self.height = width, height
+        self.tiles = tiles  # gid -> (image path, rect, flags) or None
+        self.layers = []
+        self.layer_names = {}
+
+    def add_layer(self, layer):
+        self.layers.append(layer)
+        self.layer_names[layer.name] = layer
+
+    def get_layer_by_name(self, name):
+        return self.layer_names[name]
+
+    def get_tile_image(self, gid):
+        tile = self.tiles[gid]
+        return tile_images.get(*tile) if tile else None
+
+
+class TileImages:
+    # every map cuts its tiles from the same tileset images, so a tile used by several maps is one surface
+    # maps are also built on the prefetch thread, the lock makes sure a sheet or tile is loaded and converted once
+    def __init__(self):
+        self.sheets = {}
+        self.opaque = {}
+        self.lock = threading.RLock()
+
+    def get_sheet(self, path):
+        with self.lock:
+            if path not in self.sheets:
+                self.sheets[path] = load_image(path)
+            return self.sheets[path]
+
+    def get(self, path, rect, flags):
+        key = ('tile', path, rect, flags)
+        tile = asset_cache.get(key)
+        if tile is None:
+            with self.lock:
+                tile = asset_cache.get(key)
+                if tile is None:
+                    tile = self.create(key, path, rect, flags)
+        return tile
+
+    def create(self, key, path, rect, flags):
+        # called with the lock held
+        sheet = self.get_sheet(path)
+        tile = sheet.subsurface(rect) if rect else sheet
+        if flags:
+            tile = handle_transformation(tile, TileFlags(*(bool(flags & bit) for bit in (1, 2, 4))))
+
+        # opaque tiles blit about twice as fast without alpha, the rest stays a view into the sheet
+        if key not in self.opaque:
+            self.opaque[key] = pygame.mask.from_surface(tile, 254).count() == tile.get_width() * tile.get_height()
+        return asset_cache.add(key, tile.convert() if self.opaque[key] else tile)
+
+
+# parsing
+def record_tile(filename, colorkey, **kwargs):
+    # stands in for pytmx's image loader, tiles are only remembered as a place in a tileset image
+    path = normpath(filename)
+
+    def load_tile(rect=None, flags=None):
+        bits = sum(bit for bit, flag in zip((1, 2, 4), flags or ()) if flag)
+        return path, tuple(rect) if rect else None, bits
+
+    return load_tile
+
+
+def parse_tmx_map(path):
+    tmx_map = TiledMap(path, image_loader=record_tile)
+    map_data = MapData(basename(path).split('.')[0], tmx_map.width, tmx_map.height, list(tmx_map.images))
+    for layer in tmx_map.layers:
+        if isinstance(layer, TiledTileLayer):
+            data = array('I', (gid for row in layer.data for gid in row))
+            map_data.add_layer(TileLayer(map_data, layer.name, layer.width, layer.height, data))
+        elif isinstance(layer, TiledObjectGroup):
+            map_data.add_layer(ObjectLayer(layer.name, [
+                MapObject(map_data, obj.name, obj.x, obj.y, obj.width, obj.height, obj.gid, dict(obj.properties))
+                for obj in layer]))
+    return map_data
+
+
+def hash_map_file(path):
+    # the map and the tilesets it references
+    sha = hashlib.sha1()
+    with open(path, 'rb') as file:
+        content = file.read()
+    sha.update(content)
+    for tileset in re.findall(rb'source="([^"]+\.tsx)"', content):
+        with open(join(dirname(path), tileset.decode()), 'rb') as file:
+            sha.update(file.read())
+    return sha.hexdigest()
+
+
+def get_map_dependencies(path):
+    # the tilesets a map references and the images they point to, a change to any of them can change the map
+    with open(path, 'rb') as file:
+        content = file.read()
+    dependencies = []
+    for tileset in re.findall(rb'source="([^"]+\.tsx)"', content):
+        tileset_path = normpath(join(dirname(path), tileset.decode()))
+        dependencies.append(tileset_path)
+        with open(tileset_path, 'rb') as file:
+            dependencies.extend(normpath(join(dirname(tileset_path), image.decode()))
+                                for image in re.findall(rb'source="([^"]+)"', file.read()))
+    return dependencies
+
+
+# binary format: a string table, the tile references, then every layer
+class MapWriter:
+    def __init__(self):
+        self.strings = {}
+        self.body = bytearray()
+
+    def string(self, text):
+        if text is None:
+            return -1
+        return self.strings.setdefault(text, len(self.strings))
+
+    def pack(self, format, *values):
+        self.body += struct.pack(format, *values)
+
+    def write(self, map_data):
+        self.pack('<III', map_data.width, map_data.height, len(map_data.tiles))
+        for tile in map_data.tiles:
+            if tile is None:
+                self.pack('<i', -1)
+            else:
+                path, rect, flags = tile
+                self.pack('<i4iB', self.string(path), *(rect or (-1, -1, -1, -1)), flags)
+
+        self.pack('<I', len(map_data.layers))
+        for layer in map_data.layers:
+            if isinstance(layer, TileLayer):
+                self.pack('<BiII', 0, self.string(layer.name), layer.width, layer.height)
+                data = array('I', layer.data)
+                if sys.byteorder == 'big':
+                    data.byteswap()
+                self.body += data.tobytes()
+            else:
+                self.pack('<BiI', 1, self.string(layer.name), len(layer))
+                for obj in layer:
+                    self.pack('<i4dIH', self.string(obj.name), obj.x, obj.y, obj.width, obj.height, obj.gid,
+                              len(obj.properties))
+                    for key, value in obj.properties.items():
+                        value_type = PROPERTY_TYPES.get(type(value), PROPERTY_JSON)
+                        self.pack('<iB', self.string(key), value_type)
+                        if value_type == PROPERTY_TYPES[bool]:
+                            self.pack('<?', value)
+                        elif value_type == PROPERTY_TYPES[int]:
+                            self.pack('<q', value)
+                        elif value_type == PROPERTY_TYPES[float]:
+                            self.pack('<d', value)
+                        elif value_type == PROPERTY_TYPES[str]:
+                            self.pack('<i', self.string(value))
+                        elif value_type == PROPERTY_JSON:
+                            self.pack('<i', self.string(json.dumps(value, default=str)))
+
+        strings = bytearray(struct.pack('<I', len(self.strings)))
+        for text in self.strings:
+            encoded = text.encode()
+            strings += struct.pack('<H', len(encoded)) + encoded
+        return MAP_MAGIC + bytes(strings) + bytes(self.body)
+
+
+class MapReader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, format):
+        values = struct.unpack_from(format, self.data, self.offset)
+        self.offset += struct.calcsize(format)
+        return values
+
+    def read(self, name):
+        if bytes(self.data[:len(MAP_MAGIC)]) != MAP_MAGIC:
+            raise ValueError('not a map')
+        self.offset = len(MAP_MAGIC)
+        strings = []
+        for _ in range(*self.unpack('<I')):
+            length, = self.unpack('<H')
+            strings.append(bytes(self.data[self.offset:self.offset + length]).decode())
+            self.offset += length
+
+        def string(index):
+            return strings[index] if index >= 0 else None
+
+        width, height, tile_count = self.unpack('<III')
+        tiles = []
+        for _ in range(tile_count):
+            path_index, = self.unpack('<i')
+            if path_index < 0:
+                tiles.append(None)
+            else:
+                *rect, flags = self.unpack('<4iB')
+                tiles.append((strings[path_index], tuple(rect) if rect[2] >= 0 else None, flags))
+        map_data = MapData(name, width, height, tiles)
+
+        for _ in range(*self.unpack('<I')):
+            layer_type, name_index = self.unpack('<Bi')
+            if layer_type == 0:
+                layer_width, layer_height = self.unpack('<II')
+                data = array('I')
+                data.frombytes(self.data[self.offset:self.offset + layer_width * layer_height * data.itemsize])
+                if sys.byteorder == 'big':
+                    data.byteswap()
+                self.offset += layer_width * layer_height * data.itemsize
+                map_data.add_layer(TileLayer(map_data, string(name_index), layer_width, layer_height, data))
+            else:
+                layer = ObjectLayer(string(name_index))
+                for _ in range(*self.unpack('<I')):
+                    object_name, x, y, object_width, object_height, gid, property_count = self.unpack('<i4dIH')
+                    properties = {}
+                    for _ in range(property_count):
+                        key, value_type = self.unpack('<iB')
+                        if value_type == PROPERTY_TYPES[bool]:
+                            value, = self.unpack('<?')
+                        elif value_type == PROPERTY_TYPES[int]:
+                            value, = self.unpack('<q')
+                        elif value_type == PROPERTY_TYPES[float]:
+                            value, = self.unpack('<d')
+                        elif value_type == PROPERTY_TYPES[str]:
+                            value = strings[self.unpack('<i')[0]]
+                        elif value_type == PROPERTY_JSON:
+                            value = json.loads(strings[self.unpack('<i')[0]])
+                        else:
+                            value = None
+                        properties[strings[key]] = value
+                    layer.append(MapObject(map_data, string(object_name), x, y, object_width, object_height, gid,
+                                           properties))
+                map_data.add_layer(layer)
+        return map_data
+
+
+def serialize_map(map_data):
+    return MapWriter().write(map_data)
+
+
+def deserialize_map(data, name):
+    return MapReader(data).read(name)
+
+
+def load_tmx_map(path):
+    # parsed maps are kept on disk by the hash of the map and its tilesets, so only changed maps are parsed again
+    name = basename(path).split('.')[0]
+    file_path = join(MAP_CACHE_PATH, f'{name}_{hash_map_file(path)}.map')
+    if exists(file_path):
+        try:
+            with open(file_path, 'rb') as file:
+                return deserialize_map(file.read(), name)
+        except (OSError, ValueError, struct.error) as e:
+            record_error(f"Could not read map cache {file_path}: {e}")
+
+    map_data = parse_tmx_map(path)
+    try:
+        os.makedirs(MAP_CACHE_PATH, exist_ok=True)
+        with open(file_path + '.tmp', 'wb') as file:
+            file.write(serialize_map(map_data))
+        os.replace(file_path + '.tmp', file_path)
+    except OSError as e:
+        record_error(f"Could not write map cache {file_path}: {e}")
+    return map_data
+
+
+tile_images = TileImages()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# the game runs from the code folder, its imports and relative paths expect that
+CODE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'code')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, CODE_PATH)
+os.chdir(CODE_PATH)
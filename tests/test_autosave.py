@@ -0,0 +1,83 @@
+import json
+import os
+import pytest
+
+from autosave import Autosave, RECORD_DEFEATED, RECORD_WORLD
+from save_manager import SaveManager
+from monster import Monster
+
+BUNDLED_SAVE = '../save_data/saves/sfslot0v0.6.json'
+
+
+def wait_for_writes():
+    SaveManager.executor.submit(lambda: None).result()
+
+
+@pytest.fixture
+def save_data():
+    with open(BUNDLED_SAVE) as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def monsters(save_data):
+    return {index: Monster(monster['name'], monster['level'])
+            for index, monster in enumerate(save_data['game_data']['player_monsters'])}
+
+
+@pytest.fixture
+def autosave(tmp_path, save_data, monsters):
+    autosave = Autosave(str(tmp_path))
+    autosave.start(save_data, monsters)
+    wait_for_writes()
+    return autosave
+
+
+def test_recover_replays_the_journal(tmp_path, autosave, monsters):
+    autosave.record(RECORD_WORLD, 10, 'house', (64.0, 128.0))
+    autosave.record(RECORD_DEFEATED, 11, 'o1')
+    monsters[0].update_exp(10 ** 6)
+    monsters[1].energy = 0
+    autosave.record_party(monsters, 12)
+    autosave.flush()
+    wait_for_writes()
+
+    state = Autosave(str(tmp_path)).recover()
+    assert state['current_world'] == 'house'
+    assert state['player']['pos'] == (64.0, 128.0)
+    assert state['characters'] == []
+    assert 'o1' in state['defeated']
+    assert state['player_monsters'][0]['level'] == monsters[0].level
+    assert state['player_monsters'][1]['energy'] == 0
+    assert state['play_time'] == 12
+
+
+def test_closed_session_is_not_recovered(tmp_path, autosave):
+    autosave.record(RECORD_DEFEATED, 5, 'o1')
+    autosave.close(6)
+    wait_for_writes()
+    assert Autosave(str(tmp_path)).recover() is None
+
+
+def test_torn_record_is_skipped(tmp_path, autosave):
+    autosave.record(RECORD_DEFEATED, 5, 'o1')
+    autosave.record(RECORD_DEFEATED, 6, 'o2')
+    autosave.flush()
+    wait_for_writes()
+
+    # a crash in the middle of the last write
+    size = os.path.getsize(autosave.journal_path)
+    with open(autosave.journal_path, 'r+b') as file:
+        file.truncate(size - 3)
+    state = Autosave(str(tmp_path)).recover()
+    assert 'o1' in state['defeated'] and 'o2' not in state['defeated']
+
+
+def test_compaction_keeps_the_state(tmp_path, autosave, save_data):
+    for index in range(70):
+        autosave.record(RECORD_WORLD, index, 'world', (float(index), 0.0))
+    autosave.flush(lambda: save_data)
+    wait_for_writes()
+    assert autosave.journal_records == 0
+    assert os.path.getsize(autosave.journal_path) == 0
+    assert Autosave(str(tmp_path)).recover()['current_world'] == save_data['game_data']['current_world']
@@ -0,0 +1,81 @@
+import pytest
+
+from rewind import Rewind, encode_snapshot, decode_snapshot
+from monster import Monster
+
+
+class Entity:
+    # the to_dict and from_dict of the player and the characters, without sprites
+    def __init__(self, **data):
+        self.data = data
+
+    def to_dict(self):
+        return dict(self.data)
+
+    def from_dict(self, data):
+        self.data.update(data)
+
+    @property
+    def character_data(self):
+        return self.data['character_data']
+
+
+class World:
+    def __init__(self):
+        self.current_world = 'world'
+        self.play_time = 0.
+        self.player = Entity(pos=(0., 0.), facing_direction='down', noticed=False)
+        self.character_sprites = [Entity(pos=(64. * index, 0.), facing_direction='left', has_moved=False,
+                                         can_rotate=True, has_noticed=False, character_data={'defeated': False})
+                                  for index in range(3)]
+        self.player_monsters = {0: Monster('Plumette', 5), 1: Monster('Sparchu', 5)}
+
+    def step(self, index):
+        self.play_time = float(index)
+        self.player.data['pos'] = (16. * index, 0.)
+        self.player_monsters[0].exp = 10. * index
+
+
+def test_snapshot_round_trip():
+    world = World()
+    world.step(3)
+    world.character_sprites[1].data['character_data']['defeated'] = True
+    state = decode_snapshot(encode_snapshot(world, encounter=True))
+    assert state['encounter'] and state['play_time'] == 3.
+    assert state['player']['pos'] == (48., 0.)
+    assert [character['defeated'] for character in state['characters']] == [False, True, False]
+    assert state['player_monsters'][0]['exp'] == 30.
+    assert state['player_monsters'][0]['energy'] == world.player_monsters[0].energy
+
+
+@pytest.mark.parametrize('captures', [1, 5, 23])
+def test_ring_is_bounded_and_decodes(captures):
+    world = World()
+    rewind = Rewind(size=5)
+    expected = []
+    for index in range(captures):
+        world.step(index)
+        rewind.capture(world)
+        expected.append(encode_snapshot(world))
+    assert len(rewind.snapshots) == min(captures, 5)
+    for index in range(len(rewind.snapshots)):
+        assert rewind.get_data(index) == expected[-len(rewind.snapshots):][index]
+
+
+def test_undo_encounter():
+    world = World()
+    rewind = Rewind(size=10)
+    for index in range(8):
+        world.step(index)
+        rewind.capture(world, encounter=index == 4)
+
+    index = rewind.get_last_encounter()
+    rewind.rewind(world, index)
+    assert world.player.data['pos'] == (64., 0.)
+    assert world.player_monsters[0].exp == 40.
+    assert len(rewind.snapshots) == index + 1
+
+    # the next snapshot is compressed against the one rewound to
+    world.step(9)
+    rewind.capture(world)
+    assert decode_snapshot(rewind.get_data(len(rewind.snapshots) - 1))['play_time'] == 9.
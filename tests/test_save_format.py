@@ -0,0 +1,54 @@
+import json
+import zlib
+import pytest
+
+from save_format import SAVE_MAGIC, COMPRESSION_TYPES, get_save_state, encode_save, decode_save
+
+BUNDLED_SAVE = '../save_data/saves/sfslot0v0.6.json'
+
+
+@pytest.fixture
+def save_data():
+    with open(BUNDLED_SAVE) as file:
+        return json.load(file)
+
+
+@pytest.fixture
+def state(save_data):
+    state = get_save_state(save_data)
+    state['play_time'] = 123.5
+    state['player_monsters'][0]['energy'] = 3.0
+    return state
+
+
+def normalized(state):
+    # positions come back as tuples
+    return {**state, 'player': {**state['player'], 'pos': tuple(state['player']['pos'])},
+            'characters': [{**character, 'pos': tuple(character['pos'])} for character in state['characters']]}
+
+
+@pytest.mark.parametrize('compression', COMPRESSION_TYPES)
+def test_round_trip(state, compression):
+    data = encode_save(state, compression)
+    assert data.startswith(SAVE_MAGIC)
+    assert decode_save(data) == normalized(state)
+
+
+def test_unknown_energy_is_left_out(state):
+    # json saves of older versions have no energy, the loaded monster keeps its fresh value
+    del state['player_monsters'][0]['energy']
+    assert 'energy' not in decode_save(encode_save(state))['player_monsters'][0]
+
+
+def test_legacy_json(save_data):
+    expected = normalized(get_save_state(save_data))
+    text = json.dumps(save_data).encode()
+    assert normalized(decode_save(text)) == expected
+    assert normalized(decode_save(zlib.compress(text))) == expected
+
+
+def test_newer_version_is_rejected(state):
+    data = bytearray(encode_save(state))
+    data[len(SAVE_MAGIC)] = 255
+    with pytest.raises(ValueError):
+        decode_save(bytes(data))